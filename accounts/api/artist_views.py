@@ -1,25 +1,15 @@
-from django.core.mail import send_mail
-
-from django.conf import settings
-from django.contrib.auth import get_user_model
-from django.template.loader import get_template
+from django.contrib.auth import authenticate, get_user_model
 from rest_framework import status
-from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-
-from accounts.api.serializers import UserRegistrationSerializer
-from activities.models import AllActivity
-from django.core.mail import send_mail
-from django.contrib.auth import get_user_model, authenticate
-
-
 from rest_framework.views import APIView
 
+from accounts.api.custom_jwt import get_tokens_for_user
 from accounts.api.serializers import UserRegistrationSerializer
+from accounts.tasks import send_verification_email
 from activities.models import AllActivity
-from artists.models import Artist
-from core.utils import generate_email_token, is_valid_email, is_valid_password
+from artists.models import Artist, ArtistProfile
+from core.utils import generate_email_token, is_valid_password
 
 
 User = get_user_model()
@@ -35,131 +25,94 @@ def register_artist_view(request):
     data = {}
     errors = {}
 
-    if request.method == 'POST':
-        email = request.data.get('email', "").lower()
-        first_name = request.data.get('first_name', "")
-        last_name = request.data.get('last_name', "")
-        phone = request.data.get('phone', "")
-        photo = request.FILES.get('photo')
-        country = request.data.get('country', "")
-        password = request.data.get('password', "")
-        password2 = request.data.get('password2', "")
+    email = request.data.get('email', "").lower()
+    first_name = request.data.get('first_name', "")
+    last_name = request.data.get('last_name', "")
+    phone = request.data.get('phone', "")
+    photo = request.FILES.get('photo')
+    country = request.data.get('country', "")
+    password = request.data.get('password', "")
+    password2 = request.data.get('password2', "")
 
 
-        if not email:
-            errors['email'] = ['User Email is required.']
-        elif not is_valid_email(email):
-            errors['email'] = ['Valid email required.']
-        elif check_email_exist(email):
-            errors['email'] = ['Email already exists in our database.']
+    if not email:
+        errors['email'] = ['User Email is required.']
 
-        if not first_name:
-            errors['first_name'] = ['First Name is required.']
+    if not first_name:
+        errors['first_name'] = ['First Name is required.']
 
-        if not last_name:
-            errors['last_name'] = ['last Name is required.']
+    if not last_name:
+        errors['last_name'] = ['last Name is required.']
 
-        if not phone:
-            errors['phone'] = ['Phone number is required.']
+    if not phone:
+        errors['phone'] = ['Phone number is required.']
 
-        if not password:
-            errors['password'] = ['Password is required.']
+    if not password:
+        errors['password'] = ['Password is required.']
 
-        if not password2:
-            errors['password2'] = ['Password2 is required.']
+    if not password2:
+        errors['password2'] = ['Password2 is required.']
 
-        if password != password2:
-            errors['password'] = ['Passwords dont match.']
+    if password != password2:
+        errors['password'] = ['Passwords dont match.']
 
-        if not is_valid_password(password):
-            errors['password'] = ['Password must be at least 8 characters long\n- Must include at least one uppercase letter,\n- One lowercase letter, one digit,\n- And one special character']
+    if not is_valid_password(password):
+        errors['password'] = ['Password must be at least 8 characters long\n- Must include at least one uppercase letter,\n- One lowercase letter, one digit,\n- And one special character']
 
-        if errors:
-            payload['message'] = "Errors"
-            payload['errors'] = errors
-            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+    serializer = UserRegistrationSerializer(data=request.data)
+    if not serializer.is_valid():
+        for field, field_errors in serializer.errors.items():
+            errors.setdefault(field, field_errors)
 
-        serializer = UserRegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            data["user_id"] = user.user_id
-            data["email"] = user.email
-            data["first_name"] = user.first_name
-            data["last_name"] = user.last_name
-            data["photo"] = user.photo
+    if errors:
+        payload['message'] = "Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-            if country:
-                data["country"] = user.country
+    user = serializer.save()
+    data["user_id"] = user.user_id
+    data["email"] = user.email
+    data["first_name"] = user.first_name
+    data["last_name"] = user.last_name
+    data["photo"] = user.photo
 
+    if country:
+        data["country"] = user.country
 
-            user.user_type = "Artist"
-            user.save()
 
-            artist_profile = Artist.objects.create(
-                user=user
+    email_token = generate_email_token()
 
-            )
-            artist_profile.save()
+    user.user_type = "Artist"
+    user.email_token = email_token
+    user.save(update_fields=['user_type', 'email_token'])
 
-       
+    artist = Artist.objects.create(
+        user=user
 
-            data['phone'] = user.phone
-            data['country'] = user.country
-            data['photo'] = user.photo.url
+    )
+    ArtistProfile.objects.create(artist=artist)
 
-        token = Token.objects.get(user=user).key
-        data['token'] = token
+   
 
-        email_token = generate_email_token()
+    data['phone'] = user.phone
+    data['country'] = user.country
+    data['photo'] = user.photo.url
 
-        user = User.objects.get(email=email)
-        user.email_token = email_token
-        user.save()
+    data['token'], data['refresh'] = get_tokens_for_user(user)
 
-        context = {
-            'email_token': email_token,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-        }
-#
-        txt_ = get_template("registration/emails/verify.txt").render(context)
-        html_ = get_template("registration/emails/verify.html").render(context)
-#
-        subject = 'EMAIL CONFIRMATION CODE'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
-
-
-
-        # # Use Celery chain to execute tasks in sequence
-        # email_chain = chain(
-        #     send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-        # )
-        # # Execute the Celery chain asynchronously
-        # email_chain.apply_async()
-
-        send_mail(
-            subject,
-            txt_,
-            from_email,
-            recipient_list,
-            html_message=html_,
-            fail_silently=False,
-        )
+    send_verification_email.delay('EMAIL CONFIRMATION CODE', user.email, user.first_name, user.last_name, email_token)
 
 
 
 #
-        new_activity = AllActivity.objects.create(
-            user=user,
-            subject="User Registration",
-            body=user.email + " Just created an account."
-        )
-        new_activity.save()
+    AllActivity.objects.create(
+        user=user,
+        subject="User Registration",
+        body=user.email + " Just created an account."
+    )
 
-        payload['message'] = "Successful"
-        payload['data'] = data
+    payload['message'] = "Successful"
+    payload['data'] = data
 
     return Response(payload)
 
@@ -167,14 +120,6 @@ def register_artist_view(request):
 
 
 
-def check_email_exist(email):
-
-    qs = User.objects.filter(email=email)
-    if qs.exists():
-        return True
-    else:
-        return False
-
 
 class ArtistLogin(APIView):
     authentication_classes = []
@@ -199,26 +144,13 @@ class ArtistLogin(APIView):
         if not fcm_token:
             errors['fcm_token'] = ['FCM device token is required.']
 
-        try:
-            qs = User.objects.filter(email=email)
-        except User.DoesNotExist:
-            errors['email'] = ['User does not exist.']
-
+        # authenticate() runs the hasher for unknown emails too and fires user_login_failed
+        user = authenticate(request, email=email, password=password)
 
-
-        if qs.exists():
-            not_active = qs.filter(email_verified=False)
-            if not_active:
-                errors['email'] = ["Please check your email to confirm your account or resend confirmation email."]
-
-        if not check_password(email, password):
-            errors['password'] = ['Invalid Credentials']
-
-        user = authenticate(email=email, password=password)
-
-
-        if not user:
+        if user is None:
             errors['email'] = ['Invalid Credentials']
+        elif not user.email_verified:
+            errors['email'] = ["Please check your email to confirm your account or resend confirmation email."]
 
 
 
@@ -228,13 +160,8 @@ class ArtistLogin(APIView):
             return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
 
-        try:
-            token = Token.objects.get(user=user)
-        except Token.DoesNotExist:
-            token = Token.objects.create(user=user)
-
         user.fcm_token = fcm_token
-        user.save()
+        user.save(update_fields=['fcm_token'])
 
 
         data["user_id"] = user.user_id
@@ -244,24 +171,15 @@ class ArtistLogin(APIView):
         data["photo"] = user.photo.url
         data["country"] = user.country
         data["phone"] = user.phone
-        data["token"] = token.key
+        data["token"], data["refresh"] = get_tokens_for_user(user)
 
         payload['message'] = "Successful"
         payload['data'] = data
 
-        new_activity = AllActivity.objects.create(
+        AllActivity.objects.create(
             user=user,
             subject="Artist Login",
             body=user.email + " Just logged in."
         )
-        new_activity.save()
 
         return Response(payload, status=status.HTTP_200_OK)
-
-def check_password(email, password):
-
-    try:
-        user = User.objects.get(email=email)
-        return user.check_password(password)
-    except User.DoesNotExist:
-        return False
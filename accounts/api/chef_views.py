@@ -1,21 +1,16 @@
-import re
-from django.core.mail import send_mail
-from django.contrib.auth import get_user_model, authenticate
-
-from django.conf import settings
-from django.contrib.auth import get_user_model
-from django.template.loader import get_template
+from django.contrib.auth import authenticate, get_user_model
 from rest_framework import status
-from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from accounts.api.custom_jwt import get_tokens_for_user
 from accounts.api.serializers import UserRegistrationSerializer
+from accounts.tasks import send_verification_email
 from activities.models import AllActivity
 from bank_account.models import BankAccount
-from core.utils import generate_email_token, is_valid_password
+from core.utils import generate_email_token, get_client_ip, is_rate_limited, is_valid_password
 
 User = get_user_model()
 
@@ -29,171 +24,133 @@ def register_chef(request):
     data = {}
     errors = {}
 
-    if request.method == 'POST':
-        email = request.data.get('email', "").lower()
-        first_name = request.data.get('first_name', "")
-        last_name = request.data.get('last_name', "")
-        phone = request.data.get('phone', "")
-        photo = request.data.get('photo', "")
-        #photo = request.FILES.get('photo')
-        country = request.data.get('country', "")
-        password = request.data.get('password', "")
-        password2 = request.data.get('password2', "")
+    email = request.data.get('email', "").lower()
+    first_name = request.data.get('first_name', "")
+    last_name = request.data.get('last_name', "")
+    phone = request.data.get('phone', "")
+    photo = request.data.get('photo', "")
+    #photo = request.FILES.get('photo')
+    country = request.data.get('country', "")
+    password = request.data.get('password', "")
+    password2 = request.data.get('password2', "")
 
-        phone = convert_phone_number(phone)
+    phone = convert_phone_number(phone)
 
 
-        if not email:
-            errors['email'] = ['User Email is required.']
-        elif not is_valid_email(email):
-            errors['email'] = ['Valid email required.']
-        elif check_email_exist(email):
-            errors['email'] = ['Email already exists in our database.']
+    if not email:
+        errors['email'] = ['User Email is required.']
 
-        if not first_name:
-            errors['first_name'] = ['First Name is required.']
+    if not first_name:
+        errors['first_name'] = ['First Name is required.']
 
-        if not last_name:
-            errors['last_name'] = ['Last Name is required.']
+    if not last_name:
+        errors['last_name'] = ['Last Name is required.']
 
-        if not phone:
-            errors['phone'] = ['Phone number is required.']
+    if not phone:
+        errors['phone'] = ['Phone number is required.']
 
-        if not country:
-            errors['country'] = ['Country is required.']
+    if not country:
+        errors['country'] = ['Country is required.']
 
 
-        if not password:
-            errors['password'] = ['Password is required.']
+    if not password:
+        errors['password'] = ['Password is required.']
 
-        if not password2:
-            errors['password2'] = ['Password2 is required.']
+    if not password2:
+        errors['password2'] = ['Password2 is required.']
 
-        if password != password2:
-            errors['password'] = ['Passwords dont match.']
+    if password != password2:
+        errors['password'] = ['Passwords dont match.']
 
-        if not is_valid_password(password):
-            errors['password'] = ['Password must be at least 8 characters long\n- Must include at least one uppercase letter,\n- One lowercase letter, one digit,\n- And one special character']
+    if not is_valid_password(password):
+        errors['password'] = ['Password must be at least 8 characters long\n- Must include at least one uppercase letter,\n- One lowercase letter, one digit,\n- And one special character']
 
-        if errors:
-            payload['message'] = "Errors"
-            payload['errors'] = errors
-            return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+    serializer = UserRegistrationSerializer(data=request.data)
+    if not serializer.is_valid():
+        for field, field_errors in serializer.errors.items():
+            errors.setdefault(field, field_errors)
 
-        serializer = UserRegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.save()
-            data["user_id"] = user.user_id
-            data["email"] = user.email
-            data["first_name"] = user.first_name
-            data["last_name"] = user.last_name
+    if errors:
+        payload['message'] = "Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-            user.user_type = "Chef"
-            user.phone=phone
-            if photo:
-                user.photo=photo
-            user.country=country
-            user.save()
+    user = serializer.save()
+    data["user_id"] = user.user_id
+    data["email"] = user.email
+    data["first_name"] = user.first_name
+    data["last_name"] = user.last_name
 
+    email_token = generate_email_token()
 
+    user.user_type = "Chef"
+    user.phone=phone
+    if photo:
+        user.photo=photo
+    user.country=country
+    user.email_token = email_token
+    user.save(update_fields=['user_type', 'phone', 'photo', 'country', 'email_token'])
 
-            chef = ChefProfile.objects.create(
-                user=user,
-            )
-            chef.save()
 
 
+    ChefProfile.objects.create(
+        user=user,
+    )
 
-            new_bank_account = BankAccount.objects.create(
-                user=user,
-               # balance=10000000000
 
-            )
 
-            data['phone'] = user.phone
-            data['country'] = user.country
-            data['photo'] = user.photo.url
-            data['account_id'] = new_bank_account.account_id
+    new_bank_account = BankAccount.objects.create(
+        user=user,
+       # balance=10000000000
 
-        token = Token.objects.get(user=user).key
-        data['token'] = token
+    )
 
-        email_token = generate_email_token()
+    data['phone'] = user.phone
+    data['country'] = user.country
+    data['photo'] = user.photo.url
+    data['account_id'] = new_bank_account.account_id
 
-        user = User.objects.get(email=email)
-        user.email_token = email_token
-        user.save()
+    data['token'], data['refresh'] = get_tokens_for_user(user)
 
 
-        ##### SEND SMS
+    ##### SEND SMS
 
-        #_msg = f'Your Weekend Chef OTP code is {email_token}'
-        #url = f"https://apps.mnotify.net/smsapi"
-        #api_key = settings.MNOTIFY_KEY  # Replace with your actual API key
+    #_msg = f'Your Weekend Chef OTP code is {email_token}'
+    #url = f"https://apps.mnotify.net/smsapi"
+    #api_key = settings.MNOTIFY_KEY  # Replace with your actual API key
 #
-        #print(api_key)
-        #response = requests.post(url,
-        #data={
-        #    "key": api_key,
-        #    "to": user.phone,
-        #    "msg": _msg,
-        #    "sender_id": settings.MNOTIFY_SENDER_ID,
-        #    })
-        #if response.status_code == 200:
-        #    print('##########################')
-        #    print(response.content)
-        #    payload['message'] = "Successful"
-        #else:
-        #    errors['user_id'] = ['Failed to send SMS']
+    #print(api_key)
+    #response = requests.post(url,
+    #data={
+    #    "key": api_key,
+    #    "to": user.phone,
+    #    "msg": _msg,
+    #    "sender_id": settings.MNOTIFY_SENDER_ID,
+    #    })
+    #if response.status_code == 200:
+    #    print('##########################')
+    #    print(response.content)
+    #    payload['message'] = "Successful"
+    #else:
+    #    errors['user_id'] = ['Failed to send SMS']
 #
-        #    ######################
-
-
-        context = {
-            'email_token': email_token,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-        }
-        # ##
-        txt_ = get_template("registration/emails/verify.txt").render(context)
-        html_ = get_template("registration/emails/verify.html").render(context)
-        # ##
-        subject = 'EMAIL CONFIRMATION CODE'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
-
-
-
-        # # Use Celery chain to execute tasks in sequence
-        # email_chain = chain(
-        #     send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-        # )
-        # # Execute the Celery chain asynchronously
-        # email_chain.apply_async()
-
-        send_mail(
-            subject,
-            txt_,
-            from_email,
-            recipient_list,
-            html_message=html_,
-            fail_silently=False,
-        )
+    #    ######################
 
 
+    send_verification_email.delay('EMAIL CONFIRMATION CODE', user.email, user.first_name, user.last_name, email_token)
 
 
 
-        new_activity = AllActivity.objects.create(
-            user=user,
-            subject="Chef Registration",
-            body=user.email + " Just created an account."
-        )
-        new_activity.save()
 
-        payload['message'] = "Successful"
-        payload['data'] = data
+
+    AllActivity.objects.create(
+        user=user,
+        subject="Chef Registration",
+        body=user.email + " Just created an account."
+    )
+
+    payload['message'] = "Successful"
+    payload['data'] = data
 
     return Response(payload)
 
@@ -224,26 +181,13 @@ class ChefLogin(APIView):
         if not fcm_token:
             errors['fcm_token'] = ['FCM device token is required.']
 
-        try:
-            qs = User.objects.filter(email=email)
-        except User.DoesNotExist:
-            errors['email'] = ['User does not exist.']
-
-
+        # authenticate() runs the hasher for unknown emails too and fires user_login_failed
+        user = authenticate(request, email=email, password=password)
 
-        if qs.exists():
-            not_active = qs.filter(email_verified=False)
-            if not_active:
-                errors['email'] = ["Please check your email to confirm your account or resend confirmation email."]
-
-        if not check_password(email, password):
-            errors['password'] = ['Invalid Credentials']
-
-        user = authenticate(email=email, password=password)
-
-
-        if not user:
+        if user is None:
             errors['email'] = ['Invalid Credentials']
+        elif not user.email_verified:
+            errors['email'] = ["Please check your email to confirm your account or resend confirmation email."]
 
 
 
@@ -253,13 +197,8 @@ class ChefLogin(APIView):
             return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
 
-        try:
-            token = Token.objects.get(user=user)
-        except Token.DoesNotExist:
-            token = Token.objects.create(user=user)
-
         user.fcm_token = fcm_token
-        user.save()
+        user.save(update_fields=['fcm_token'])
 
 
         data["user_id"] = user.user_id
@@ -269,17 +208,16 @@ class ChefLogin(APIView):
         data["photo"] = user.photo.url
         data["country"] = user.country
         data["phone"] = user.phone
-        data["token"] = token.key
+        data["token"], data["refresh"] = get_tokens_for_user(user)
 
         payload['message'] = "Successful"
         payload['data'] = data
 
-        new_activity = AllActivity.objects.create(
+        AllActivity.objects.create(
             user=user,
             subject="Chef Login",
             body=user.email + " Just logged in."
         )
-        new_activity.save()
 
         return Response(payload, status=status.HTTP_200_OK)
 
@@ -299,11 +237,21 @@ def verify_email(request):
     email = request.data.get('email', '').lower()
     email_token = request.data.get('email_token', '')
 
+    # Per client IP, plus per email so the 4-digit token can't be guessed from many IPs
+    if is_rate_limited(f"verify-email:{get_client_ip(request)}") or (
+        email and is_rate_limited(f"verify-email-address:{email}", limit=10, timeout=900)
+    ):
+        payload['message'] = "Error"
+        payload['errors'] = {'email_token': ['Too many attempts. Please try again later.']}
+        return Response(payload, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
     if not email:
         email_errors.append('Email is required.')
 
-    qs = User.objects.filter(email=email)
-    if not qs.exists():
+    user = User.objects.filter(email=email).only(
+        'id', 'user_id', 'email', 'email_token', 'first_name', 'last_name', 'photo', 'is_active', 'email_verified'
+    ).first()
+    if user is None:
         email_errors.append('Email does not exist.')
 
     if email_errors:
@@ -312,11 +260,8 @@ def verify_email(request):
     if not email_token:
         token_errors.append('Token is required.')
 
-    user = None
-    if qs.exists():
-        user = qs.first()
-        if email_token != user.email_token:
-            token_errors.append('Invalid Token.')
+    if user is not None and email_token != user.email_token:
+        token_errors.append('Invalid Token.')
 
     if token_errors:
         errors['email_token'] = token_errors
@@ -328,31 +273,25 @@ def verify_email(request):
 
 
 
-    try:
-        token = Token.objects.get(user=user)
-    except Token.DoesNotExist:
-        token = Token.objects.create(user=user)
-
     user.is_active = True
     user.email_verified = True
-    user.save()
+    user.save(update_fields=['is_active', 'email_verified'])
 
     data["user_id"] = user.user_id
     data["email"] = user.email
     data["first_name"] = user.first_name
     data["last_name"] = user.last_name
     data["photo"] = user.photo.url
-    data["token"] = token.key
+    data["token"], data["refresh"] = get_tokens_for_user(user)
 
     payload['message'] = "Successful"
     payload['data'] = data
 
-    new_activity = AllActivity.objects.create(
+    AllActivity.objects.create(
         user=user,
         subject="Verify Email",
         body=user.email + " just verified their email",
     )
-    new_activity.save()
 
     return Response(payload, status=status.HTTP_200_OK)
 
@@ -378,19 +317,23 @@ def resend_email_verification(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
-    qs = User.objects.filter(email=email)
-    if not qs.exists():
+    if is_rate_limited(f"resend-email:{email}"):
+        errors['email'] = ['Too many requests. Please try again later.']
+        payload['message'] = "Error"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+    user = User.objects.filter(email=email).only('id', 'user_id', 'email', 'email_token', 'first_name', 'last_name').first()
+    if user is None:
         email_errors.append('Email does not exist.')
-        if email_errors:
-            errors['email'] = email_errors
-            payload['message'] = "Error"
-            payload['errors'] = errors
-            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        errors['email'] = email_errors
+        payload['message'] = "Error"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
-    user = User.objects.filter(email=email).first()
     otp_code = generate_email_token()
     user.email_token = otp_code
-    user.save()
+    user.save(update_fields=['email_token'])
 
 
 
@@ -416,46 +359,17 @@ def resend_email_verification(request):
     #     ######################
 
 
-    context = {
-        'email_token': otp_code,
-        'email': user.email,
-        'first_name': user.first_name,
-        'last_name': user.last_name
-    }
-#
-    txt_ = get_template("registration/emails/verify.txt").render(context)
-    html_ = get_template("registration/emails/verify.html").render(context)
-#
-    subject = 'OTP CODE'
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [user.email]
-
-     # Use Celery chain to execute tasks in sequence
-    # email_chain = chain(
-    #      send_generic_email.si(subject, txt_, from_email, recipient_list, html_),
-    #   )
-    #  # Execute the Celery chain asynchronously
-    # email_chain.apply_async()
-
-    send_mail(
-        subject,
-        txt_,
-        from_email,
-        recipient_list,
-        html_message=html_,
-        fail_silently=False,
-    )
+    send_verification_email.delay('OTP CODE', user.email, user.first_name, user.last_name, otp_code)
 
     #data["otp_code"] = otp_code
     data["email"] = user.email
     data["user_id"] = user.user_id
 
-    new_activity = AllActivity.objects.create(
+    AllActivity.objects.create(
         user=user,
         subject="Email verification sent",
         body="Email verification sent to " + user.email,
     )
-    new_activity.save()
 
     payload['message'] = "Successful"
     payload['data'] = data
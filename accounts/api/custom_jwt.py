@@ -3,13 +3,27 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from accounts.models import get_user_cache_key
+
 User = get_user_model()
 
+USER_CACHE_TIMEOUT = 60
+
 
 class CustomJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
         user_id = validated_token['user_id']
-        return User.objects.get(user_id=user_id)
+        cache_key = get_user_cache_key(user_id)
+
+        user = cache.get(cache_key)
+        if user is None:
+            user = User.objects.only(
+                'id', 'user_id', 'email', 'first_name', 'last_name', 'user_type', 'is_active', 'admin', 'staff'
+            ).get(user_id=user_id)
+            cache.set(cache_key, user, timeout=USER_CACHE_TIMEOUT)
+        return user
 
 
 ###############################################################################
@@ -34,6 +48,11 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
+def get_tokens_for_user(user):
+    refresh = CustomTokenObtainPairSerializer.get_token(user)
+    return str(refresh.access_token), str(refresh)
+
+
 
 class CustomTokenRefreshView(BaseTokenRefreshView):
     def post(self, request, *args, **kwargs):
@@ -1,4 +1,3 @@
-import re
 from django.core.mail import EmailMessage, send_mail
 
 from celery import chain
@@ -9,7 +8,6 @@ from django.shortcuts import render
 from django.template.loader import get_template
 import requests
 from rest_framework import status, generics
-from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -46,20 +44,18 @@ class PasswordResetView(generics.GenericAPIView):
             payload['errors'] = errors
             return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
-        qs = User.objects.filter(email=email)
-        if not qs.exists():
+        user = User.objects.filter(email=email).only('id', 'user_id', 'email', 'otp_code', 'first_name', 'last_name').first()
+        if user is None:
             email_errors.append('Email does not exist.')
-            if email_errors:
-                errors['email'] = email_errors
-                payload['message'] = "Error"
-                payload['errors'] = errors
-                return Response(payload, status=status.HTTP_404_NOT_FOUND)
+            errors['email'] = email_errors
+            payload['message'] = "Error"
+            payload['errors'] = errors
+            return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
 
-        user = User.objects.filter(email=email).first()
         otp_code = generate_random_otp_code()
         user.otp_code = otp_code
-        user.save()
+        user.save(update_fields=['otp_code'])
 
         context = {
             'otp_code': otp_code,
@@ -95,12 +91,11 @@ class PasswordResetView(generics.GenericAPIView):
         data["email"] = user.email
         data["user_id"] = user.user_id
 
-        new_activity = AllActivity.objects.create(
+        AllActivity.objects.create(
             user=user,
             subject="Reset Password",
             body="OTP sent to " + user.email,
         )
-        new_activity.save()
 
         payload['message'] = "Successful"
         payload['data'] = data
@@ -175,19 +170,17 @@ def resend_password_otp(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
-    qs = User.objects.filter(email=email)
-    if not qs.exists():
+    user = User.objects.filter(email=email).only('id', 'user_id', 'email', 'otp_code', 'first_name', 'last_name').first()
+    if user is None:
         email_errors.append('Email does not exist.')
-        if email_errors:
-            errors['email'] = email_errors
-            payload['message'] = "Error"
-            payload['errors'] = errors
-            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        errors['email'] = email_errors
+        payload['message'] = "Error"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
-    user = User.objects.filter(email=email).first()
     otp_code = generate_random_otp_code()
     user.otp_code = otp_code
-    user.save()
+    user.save(update_fields=['otp_code'])
 
     context = {
         'otp_code': otp_code,
@@ -223,12 +216,11 @@ def resend_password_otp(request):
     data["email"] = user.email
     data["user_id"] = user.user_id
 
-    new_activity = AllActivity.objects.create(
+    AllActivity.objects.create(
         user=user,
         subject="Password OTP sent",
         body="Password OTP sent to " + user.email,
     )
-    new_activity.save()
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -261,14 +253,13 @@ def new_password_reset_view(request):
             payload['errors'] = errors
             return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
-    qs = User.objects.filter(email=email)
-    if not qs.exists():
+    user = User.objects.filter(email=email).only('id', 'user_id', 'email', 'password').first()
+    if user is None:
         email_errors.append('Email does not exists.')
-        if email_errors:
-            errors['email'] = email_errors
-            payload['message'] = "Error"
-            payload['errors'] = errors
-            return Response(payload, status=status.HTTP_404_NOT_FOUND)
+        errors['email'] = email_errors
+        payload['message'] = "Error"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
 
     if not new_password:
@@ -288,9 +279,8 @@ def new_password_reset_view(request):
             payload['errors'] = errors
             return Response(payload, status=status.HTTP_404_NOT_FOUND)
 
-    user = User.objects.filter(email=email).first()
     user.set_password(new_password)
-    user.save()
+    user.save(update_fields=['password'])
 
     data['email'] = user.email
     data['user_id'] = user.user_id
@@ -301,44 +291,3 @@ def new_password_reset_view(request):
 
     return Response(payload, status=status.HTTP_200_OK)
 
-
-
-
-
-def is_valid_email(email):
-    # Regular expression pattern for basic email validation
-    pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-
-    # Using re.match to check if the email matches the pattern
-    if re.match(pattern, email):
-        return True
-    else:
-        return False
-
-
-def is_valid_password(password):
-    # Check for at least 8 characters
-    if len(password) < 8:
-        return False
-
-    # Check for at least one uppercase letter
-    if not re.search(r'[A-Z]', password):
-        return False
-
-    # Check for at least one lowercase letter
-    if not re.search(r'[a-z]', password):
-        return False
-
-    # Check for at least one digit
-    if not re.search(r'[0-9]', password):
-        return False
-
-    # Check for at least one special character
-    if not re.search(r'[-!@#\$%^&*_()-+=/.,<>?"~`£{}|:;]', password):
-        return False
-
-    return True
-
-
-
-
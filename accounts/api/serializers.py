@@ -11,8 +11,15 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['email', 'first_name', 'last_name','password', 'password2']
         extra_kwargs = {
             'password': {'write_only': True},
+            'email': {'validators': []},
         }
 
+    def validate_email(self, value):
+        value = value.lower()
+        if User.objects.filter(email=value).exists():
+            raise serializers.ValidationError('Email already exists in our database.')
+        return value
+
     def save(self):
         user = User(
             email=self.validated_data['email'].lower(),
@@ -3,6 +3,7 @@ from django.urls import path
 from accounts.api.admin_view import AdminLogin, register_admin_view
 from accounts.api.artist_views import ArtistLogin, register_artist_view
 from accounts.api.chef_views import resend_email_verification, verify_email
+from accounts.api.custom_jwt import CustomTokenRefreshView
 from accounts.api.password_views import PasswordResetView, confirm_otp_password_view, new_password_reset_view, resend_password_otp
 
 app_name = 'accounts'
@@ -26,6 +27,8 @@ urlpatterns = [
 
 
 
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name="token_refresh"),
+
     path('forgot-user-password/', PasswordResetView.as_view(), name="forgot_password"),
     path('confirm-password-otp/', confirm_otp_password_view, name="confirm_otp_password"),
     path('resend-password-otp/', resend_password_otp, name="resend_password_otp"),
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def create_user_trigram_indexes(sender, using="default", **kwargs):
+    from core.search import create_trigram_indexes
+
+    create_trigram_indexes(using, "accounts_user", ["email", "first_name", "last_name"])
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "accounts"
+
+    def ready(self):
+        post_migrate.connect(create_user_trigram_indexes, sender=self)
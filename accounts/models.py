@@ -1,14 +1,14 @@
 import os
-import random
+import secrets
 from django.conf import settings
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
+from django.core.cache import cache
 from django.db import models
-from django.db.models import Q
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from rest_framework.authtoken.models import Token
 
-from core.utils import unique_user_id_generator
+from core.search import trigram_search
+from core.utils import generate_user_id
 
 
 def get_default_profile_image():
@@ -22,7 +22,7 @@ def get_file_ext(filepath):
 
 
 def upload_image_path(instance, filename):
-    new_filename = random.randint(1, 3910209312)
+    new_filename = secrets.token_hex(16)
     name, ext = get_file_ext(filename)
     final_filename = '{new_filename}{ext}'.format(new_filename=new_filename, ext=ext)
     return "users/{final_filename}".format(
@@ -77,8 +77,7 @@ class UserManager(BaseUserManager):
         qs = self.get_queryset()
 
         if query is not None:
-            or_lookup = (Q(email__icontains=query) | Q(full_name__icontains=query))
-            qs = qs.filter(or_lookup).distinct()
+            qs = trigram_search(qs, ['email', 'first_name', 'last_name'], query, rank=True)
 
         return qs
 
@@ -99,7 +98,7 @@ USER_TYPE = (
 
 
 class User(AbstractBaseUser):
-    user_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
+    user_id = models.CharField(max_length=255, blank=True, null=True, unique=True, default=generate_user_id)
     email = models.EmailField(max_length=255, unique=True)
     username = models.CharField(max_length=255, blank=True, null=True, unique=True)
     first_name = models.CharField(max_length=255, blank=True, null=True)
@@ -168,23 +167,19 @@ class User(AbstractBaseUser):
 
 
 
-@receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def create_auth_token(sender, instance=None, created=False, **kwargs):
-    if created:
-        Token.objects.create(user=instance)
+def get_user_cache_key(user_id):
+    return "user:{user_id}".format(user_id=user_id)
 
 
-def pre_save_user_id_receiver(sender, instance, *args, **kwargs):
-    if not instance.user_id:
-        instance.user_id = unique_user_id_generator(instance)
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def clear_cached_user(sender, instance=None, **kwargs):
+    if instance.user_id:
+        cache.delete(get_user_cache_key(instance.user_id))
 
-pre_save.connect(pre_save_user_id_receiver, sender=User)
 
 
 
-
-
-class UserContact(AbstractBaseUser):
+class UserContact(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_contacts')
     phone_number = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -192,7 +187,7 @@ class UserContact(AbstractBaseUser):
 
 
 
-class UserEmergencyContact(AbstractBaseUser):
+class UserEmergencyContact(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_emergency_contacts')
     phone_number = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
@@ -0,0 +1,30 @@
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import get_template
+
+
+_VERIFY_TXT = get_template("registration/emails/verify.txt")
+_VERIFY_HTML = get_template("registration/emails/verify.html")
+
+
+@shared_task
+def send_verification_email(subject, email, first_name, last_name, email_token):
+    context = {
+        'email_token': email_token,
+        'email': email,
+        'first_name': first_name,
+        'last_name': last_name,
+    }
+
+    txt_ = _VERIFY_TXT.render(context)
+    html_ = _VERIFY_HTML.render(context)
+
+    send_mail(
+        subject,
+        txt_,
+        settings.DEFAULT_FROM_EMAIL,
+        [email],
+        html_message=html_,
+        fail_silently=False,
+    )
@@ -1,9 +1,10 @@
 from django.contrib import admin
 
-from artists.models import Album, Artist, Contributor, Genre, PlatformAvailability, Track
+from artists.models import Album, Artist, ArtistProfile, Contributor, Genre, PlatformAvailability, Track
 
 # Register your models here.
 admin.site.register(Artist)
+admin.site.register(ArtistProfile)
 admin.site.register(Genre)
 admin.site.register(Album)
 admin.site.register(Track)
@@ -1,6 +1,113 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate, pre_migrate
+
+# Snapshot of the ArtistProfile.FIELDS columns artists_artist carried before ArtistProfile existed
+ARTIST_PROFILE_STASH_TABLE = "artists_artistprofile_stash"
+
+
+def stash_artist_profile_columns(sender, using="default", **kwargs):
+    """
+    Before migrating, copy the old profile columns of artists_artist (if it still
+    has them) into a stash table, since the regenerated migration drops them.
+    :param sender:
+    :param using:
+    :return:
+    """
+    from artists.models import ArtistProfile
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        if "artists_artist" not in connection.introspection.table_names(cursor):
+            return
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, "artists_artist")}
+        if "bio" not in columns:
+            return
+        cursor.execute("DROP TABLE IF EXISTS {}".format(quote(ARTIST_PROFILE_STASH_TABLE)))
+        cursor.execute("CREATE TABLE {stash} AS SELECT id AS artist_id, {columns} FROM artists_artist".format(
+            stash=quote(ARTIST_PROFILE_STASH_TABLE),
+            columns=", ".join(quote(column) for column in ArtistProfile.FIELDS),
+        ))
+
+
+def create_artist_profiles(sender, using="default", **kwargs):
+    """
+    After migrating, give every artist its ArtistProfile row: copied from the
+    stash when there is one (which is then dropped), empty otherwise.
+    :param sender:
+    :param using:
+    :return:
+    """
+    from artists.models import ArtistProfile
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(column) for column in ArtistProfile.FIELDS)
+
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        if "artists_artistprofile" not in tables:
+            return
+        if ARTIST_PROFILE_STASH_TABLE in tables:
+            cursor.execute(
+                "INSERT INTO artists_artistprofile (artist_id, {columns}) "
+                "SELECT s.artist_id, {columns} FROM {stash} s "
+                "WHERE EXISTS (SELECT 1 FROM artists_artist a WHERE a.id = s.artist_id) "
+                "AND NOT EXISTS (SELECT 1 FROM artists_artistprofile p WHERE p.artist_id = s.artist_id)".format(
+                    columns=columns, stash=quote(ARTIST_PROFILE_STASH_TABLE)
+                )
+            )
+            cursor.execute("DROP TABLE {}".format(quote(ARTIST_PROFILE_STASH_TABLE)))
+        cursor.execute(
+            "INSERT INTO artists_artistprofile (artist_id, bio) "
+            "SELECT a.id, '' FROM artists_artist a "
+            "WHERE NOT EXISTS (SELECT 1 FROM artists_artistprofile p WHERE p.artist_id = a.id)"
+        )
+
+
+def create_artist_trigram_indexes(sender, using="default", **kwargs):
+    from core.search import create_trigram_indexes
+
+    create_trigram_indexes(using, "artists_artist", ["name", "stage_name"])
+    create_trigram_indexes(using, "artists_artistprofile", ["bio"])
+    create_trigram_indexes(using, "artists_album", ["title"])
+    create_trigram_indexes(using, "artists_track", ["title", "isrc_code", "artist_name"])
+    create_trigram_indexes(using, "artists_contributor", ["name", "role"])
+
+
+def backfill_artist_names(sender, using="default", **kwargs):
+    """
+    Fill the denormalized artist_name of tracks/albums that predate the column
+    (sync_artist_name only sets it on save). Rows already filled are skipped.
+    :param sender:
+    :param using:
+    :return:
+    """
+    connection = connections[using]
+
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        for table in ("artists_track", "artists_album"):
+            if table not in tables:
+                continue
+            cursor.execute(
+                "UPDATE {table} SET artist_name = "
+                "(SELECT a.name FROM artists_artist a WHERE a.id = {table}.artist_id) "
+                "WHERE artist_name = '' "
+                "AND EXISTS (SELECT 1 FROM artists_artist a WHERE a.id = {table}.artist_id AND a.name <> '')".format(
+                    table=table
+                )
+            )
 
 
 class ArtistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'artists'
+
+    def ready(self):
+        pre_migrate.connect(stash_artist_profile_columns, sender=self)
+        post_migrate.connect(create_artist_profiles, sender=self)
+        post_migrate.connect(backfill_artist_names, sender=self)
+        post_migrate.connect(create_artist_trigram_indexes, sender=self)
@@ -1,43 +1,56 @@
-from django.db import models
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, pre_save
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
-from core.utils import unique_artist_id_generator, unique_track_id_generator
+from core.utils import generate_artist_id, generate_track_id
 
 User = get_user_model()
 
 class Artist(models.Model):
-    artist_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
+    artist_id = models.CharField(max_length=255, blank=True, null=True, unique=True, default=generate_artist_id)
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='artists')
     name = models.CharField(max_length=255)
     stage_name = models.CharField(max_length=255, blank=True, null=True)
-    bio = models.TextField(blank=True)
-    profile_image = models.ImageField(upload_to='artist_profiles/', blank=True, null=True)
-    spotify_url = models.URLField(blank=True, null=True)
-    shazam_url = models.URLField(blank=True, null=True)
-    instagram = models.URLField(blank=True, null=True)
-    twitter = models.URLField(blank=True, null=True)
-    website = models.URLField(blank=True, null=True)
-    contact_email = models.EmailField(blank=True, null=True)
 
     is_archived = models.BooleanField(default=False)
     active = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_archived', '-created_at', '-id'], name='artist_arch_idx'),
+        ]
+
     def __str__(self):
         return self.name
-    
 
-def pre_save_artist_id_receiver(sender, instance, *args, **kwargs):
-    if not instance.artist_id:
-        instance.artist_id = unique_artist_id_generator(instance)
-
-pre_save.connect(pre_save_artist_id_receiver, sender=Artist)
 
+class ArtistProfile(models.Model):
+    """
+    Wide, rarely-read artist columns, kept off artists_artist so list and
+    search scans only read the narrow row.
+    """
+    FIELDS = ['bio', 'profile_image', 'spotify_url', 'shazam_url', 'instagram', 'twitter', 'website', 'contact_email']
 
+    artist = models.OneToOneField(Artist, on_delete=models.CASCADE, related_name='profile')
+    bio = models.TextField(blank=True)
+    profile_image = models.ImageField(upload_to='artist_profiles/', blank=True, null=True)
+    spotify_url = models.URLField(blank=True, null=True)
+    shazam_url = models.URLField(blank=True, null=True)
+    instagram = models.URLField(blank=True, null=True)
+    twitter = models.URLField(blank=True, null=True)
+    website = models.URLField(blank=True, null=True)
+    contact_email = models.EmailField(blank=True, null=True)
 
+    def __str__(self):
+        return self.artist.name
 
 
 class Genre(models.Model):
@@ -51,9 +64,89 @@ class Genre(models.Model):
     def __str__(self):
         return self.name
 
+
+GENRE_NAMES_CACHE_KEY = "genre:names"
+
+
+def get_genre_names():
+    names = cache.get(GENRE_NAMES_CACHE_KEY)
+    if names is None:
+        names = dict(Genre.objects.values_list('id', 'name'))
+        cache.set(GENRE_NAMES_CACHE_KEY, names, None)
+    return names
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def clear_cached_genre_names(sender, **kwargs):
+    cache.delete(GENRE_NAMES_CACHE_KEY)
+    bump_list_version('track')
+
+
+LIST_VERSION_KEY = "{}_list:version"
+
+
+def get_list_version(name):
+    """
+    Current version of a cached list (e.g. 'artist', 'track'); list cache keys embed it.
+    :param name:
+    :return:
+    """
+    return cache.get_or_set(LIST_VERSION_KEY.format(name), 1, None)
+
+
+def bump_list_version(*names):
+    """
+    Retire every cached page of the named lists at once.
+    :param names:
+    :return:
+    """
+    for name in names:
+        key = LIST_VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_artist_list_version():
+    return get_list_version('artist')
+
+
+def bump_artist_list_version():
+    bump_list_version('artist')
+
+
+@receiver([post_save, post_delete], sender=Artist)
+@receiver([post_save, post_delete], sender=ArtistProfile)
+def clear_cached_artist_lists(sender, **kwargs):
+    bump_artist_list_version()
+
+
+def sync_artist_name(instance):
+    """
+    Copy the artist's name onto a Track/Album so list endpoints don't join artists_artist.
+    :param instance:
+    :return:
+    """
+    if type(instance).artist.is_cached(instance):
+        instance.artist_name = instance.artist.name
+    elif instance.artist_id and not instance.artist_name:
+        instance.artist_name = Artist.objects.values_list('name', flat=True).get(pk=instance.artist_id)
+
+
+@receiver(post_save, sender=Artist)
+def propagate_artist_name(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    Album.objects.filter(artist=instance).exclude(artist_name=instance.name).update(artist_name=instance.name)
+    Track.objects.filter(artist=instance).exclude(artist_name=instance.name).update(artist_name=instance.name)
+    bump_list_version('track')
+
+
 class Album(models.Model):
     title = models.CharField(max_length=255)
     artist = models.ForeignKey(Artist, on_delete=models.CASCADE)
+    artist_name = models.CharField(max_length=255, blank=True, default='')
     release_date = models.DateField()
     cover_art = models.ImageField(upload_to='album_covers/')
     upc_code = models.CharField(max_length=30, unique=True, help_text="Universal Product Code")
@@ -63,14 +156,32 @@ class Album(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None:
+            sync_artist_name(self)
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"{self.title} - {self.artist.name}"
+        return f"{self.title} - {self.artist_name}"
+
+
+class TrackQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related('album')
+
+    def with_credits(self):
+        return self.prefetch_related(
+            models.Prefetch('contributors', queryset=Contributor.objects.only('id', 'name', 'role', 'track_id')),
+            models.Prefetch('platformavailability_set', queryset=PlatformAvailability.objects.only('id', 'platform', 'url', 'track_id')),
+        )
+
 
 class Track(models.Model):
-    track_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
+    track_id = models.CharField(max_length=255, blank=True, null=True, unique=True, default=generate_track_id)
 
     title = models.CharField(max_length=255)
-    artist = models.ForeignKey(Artist, on_delete=models.CASCADE)
+    artist = models.ForeignKey(Artist, on_delete=models.CASCADE, db_index=False)  # covered by track_artist_arch_idx
+    artist_name = models.CharField(max_length=255, blank=True, default='')
 
     album = models.ForeignKey(Album, on_delete=models.SET_NULL, null=True, blank=True)
     
@@ -92,26 +203,35 @@ class Track(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def calculate_royalty(self, duration):
-
-        rate_per_second = 0.01  # Example: 1 cent per second
-        duration_seconds = duration.total_seconds()
-        royalty_amount = duration_seconds * rate_per_second
-        return round(royalty_amount, 2)
-
-    def __str__(self):
-        return f"{self.title} by {self.artist.name}"
-
+    objects = TrackQuerySet.as_manager()
 
-def pre_save_track_id_receiver(sender, instance, *args, **kwargs):
-    if not instance.track_id:
-        instance.track_id = unique_track_id_generator(instance)
+    class Meta:
+        indexes = [
+            models.Index(fields=['artist', 'is_archived'], name='track_artist_arch_idx'),
+            # List pages: keyset order over just the active or just the archived rows
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_archived=False), name='track_active_idx'),
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_archived=True), name='track_archived_idx'),
+        ]
 
-pre_save.connect(pre_save_track_id_receiver, sender=Track)
+    ROYALTY_RATE_CENTS = 1  # Example: 1 cent per second
 
+    def calculate_royalty(self, duration):
+        cents = round(duration.total_seconds()) * self.ROYALTY_RATE_CENTS
+        return Decimal(cents) / 100
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            sync_artist_name(self)
+        if self.duration is not None and (update_fields is None or 'duration' in update_fields):
+            self.royalty_amount = self.calculate_royalty(self.duration)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'royalty_amount'}
+        super().save(*args, **kwargs)
 
+    def __str__(self):
+        return f"{self.title} by {self.artist_name}"
 
-    
 
 class Contributor(models.Model):
     ROLE_CHOICES = [
@@ -132,6 +252,12 @@ class Contributor(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_archived=False), name='contrib_active_idx'),
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_archived=True), name='contrib_archived_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.role}) on {self.track.title}"
 
@@ -156,3 +282,15 @@ class PlatformAvailability(models.Model):
 
     def __str__(self):
         return f"{self.track.title} on {self.platform}"
+
+
+# Cached track/contributor list pages show album and track titles, so those writes retire them too
+@receiver([post_save, post_delete], sender=Album)
+@receiver([post_save, post_delete], sender=Track)
+def clear_cached_track_lists(sender, **kwargs):
+    bump_list_version('track', 'contributor')
+
+
+@receiver([post_save, post_delete], sender=Contributor)
+def clear_cached_contributor_lists(sender, **kwargs):
+    bump_list_version('contributor')
@@ -10,6 +10,14 @@ User = get_user_model()
 
 
 class ArtistSerializer(serializers.ModelSerializer):
+    bio = serializers.CharField(source='profile.bio', read_only=True)
+    profile_image = serializers.ImageField(source='profile.profile_image', read_only=True)
+    spotify_url = serializers.URLField(source='profile.spotify_url', read_only=True)
+    shazam_url = serializers.URLField(source='profile.shazam_url', read_only=True)
+    instagram = serializers.URLField(source='profile.instagram', read_only=True)
+    twitter = serializers.URLField(source='profile.twitter', read_only=True)
+    website = serializers.URLField(source='profile.website', read_only=True)
+    contact_email = serializers.EmailField(source='profile.contact_email', read_only=True)
 
     class Meta:
         model = Artist
@@ -18,7 +26,7 @@ class ArtistSerializer(serializers.ModelSerializer):
 
 
 from rest_framework import serializers
-from .models import Genre, Album, Track, Contributor, PlatformAvailability
+from .models import Genre, Album, Track, Contributor, PlatformAvailability, get_genre_names
 
 # Genre Serializer
 class GenreSerializer(serializers.ModelSerializer):
@@ -28,21 +36,47 @@ class GenreSerializer(serializers.ModelSerializer):
 
 # Album Serializer
 class AlbumSerializer(serializers.ModelSerializer):
-    artist_name = serializers.CharField(source='artist.name', read_only=True)  # To include artist name in the response
-
     class Meta:
         model = Album
         fields = '__all__'
+        read_only_fields = ['artist_name']
+
+# Album list rows: no cover_art URL, that comes from the details endpoint
+class AlbumListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Album
+        fields = ['id', 'title', 'artist', 'artist_name', 'release_date', 'upc_code', 'is_archived', 'active', 'created_at', 'updated_at']
 
 # Track Serializer
 class TrackSerializer(serializers.ModelSerializer):
-    artist_name = serializers.CharField(source='artist.name', read_only=True)  # To include artist name in the response
     album_title = serializers.CharField(source='album.title', read_only=True)  # To include album title in the response
-    genre_name = serializers.CharField(source='genre.name', read_only=True)  # To include genre name in the response
+    genre_name = serializers.SerializerMethodField()  # Resolved from the cached genre table, no join needed
 
     class Meta:
         model = Track
         fields = '__all__'
+        read_only_fields = ['artist_name']
+
+    def get_genre_name(self, obj):
+        return get_genre_names().get(obj.genre_id)
+
+
+class TrackContributorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Contributor
+        fields = ['id', 'name', 'role']
+
+
+class TrackPlatformSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PlatformAvailability
+        fields = ['id', 'platform', 'url']
+
+
+# Track details, with credits and platform links (use with Track.objects.with_credits())
+class TrackDetailsSerializer(TrackSerializer):
+    contributors = TrackContributorSerializer(many=True, read_only=True)
+    platforms = TrackPlatformSerializer(source='platformavailability_set', many=True, read_only=True)
 
 # Contributor Serializer
 class ContributorSerializer(serializers.ModelSerializer):
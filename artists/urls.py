@@ -1,11 +1,11 @@
 from django.urls import path
 
 from artists.views.albums_views import add_album, archive_album, delete_album, edit_album, get_album_details_view, get_all_albums_view, get_all_archived_albums_view, unarchive_album
-from artists.views.artist_views import add_artist, archive_artist, edit_artist, get_all_archived_artists_view, get_all_artists_view, get_artist_details_view, unarchive_artist
-from artists.views.contributions_views import add_contributor, archive_contributor, delete_contributor, edit_contributor, get_all_archived_contributors_view, get_all_contributors_view, get_contributor_details_view, unarchive_contributor
+from artists.views.artist_views import add_artist, archive_artist, edit_artist, export_artists_view, get_all_archived_artists_view, get_all_artists_view, get_artist_details_view, unarchive_artist
+from artists.views.contributions_views import add_contributor, add_contributors, archive_contributor, delete_contributor, edit_contributor, export_contributors_view, get_all_archived_contributors_view, get_all_contributors_view, get_contributor_details_view, unarchive_contributor
 from artists.views.genre_views import add_genre, archive_genre, delete_genre, edit_genre, get_all_archived_genres_view, get_all_genres_view, unarchive_genre
-from artists.views.platforms_views import add_platform_availability, delete_platform_availability, get_all_platform_availability_view, get_platform_availability_details_view
-from artists.views.tracks_views import add_track, archive_track, delete_track, edit_track, get_all_archived_tracks_view, get_all_tracks_view, get_track_details_view, unarchive_track
+from artists.views.platforms_views import add_platform_availability, add_platform_availabilities, delete_platform_availability, get_all_platform_availability_view, get_platform_availability_details_view
+from artists.views.tracks_views import add_track, archive_track, delete_track, edit_track, export_tracks_view, get_all_archived_tracks_view, get_all_tracks_view, get_track_details_view, unarchive_track
 
 app_name = "artists"
 
@@ -20,6 +20,7 @@ urlpatterns = [
     path('unarchive-artist/', unarchive_artist, name='unarchive_artist'),
     # path('delete/', delete_artist, name='delete_artist'),
     path('get-all-archived-artists/', get_all_archived_artists_view, name='archived_artists'),
+    path('export-artists/', export_artists_view, name='export_artists'),
 
     # 🎧 Genres
     path('add-genre/', add_genre, name='add_genre'),
@@ -50,9 +51,11 @@ urlpatterns = [
     path('unarchive-track/', unarchive_track, name='unarchive_track'),
     path('delete-track/', delete_track, name='delete_track'),
     path('get-all-archived-tracks/', get_all_archived_tracks_view, name='archived_tracks'),
+    path('export-tracks/', export_tracks_view, name='export_tracks'),
 # 
     # # 👥 Contributors
     path('add-contributor/', add_contributor, name='add_contributor'),
+    path('add-contributors/', add_contributors, name='add_contributors'),
     path('get-all-contributors/', get_all_contributors_view, name='get_all_contributors'),
     path('get-contributor-details/', get_contributor_details_view, name='get_contributor_details'),
     path('edit-contributor/', edit_contributor, name='edit_contributor'),
@@ -60,9 +63,11 @@ urlpatterns = [
     path('unarchive-contributor/', unarchive_contributor, name='unarchive_contributor'),
     path('delete-contributor/', delete_contributor, name='delete_contributor'),
     path('get-all-archived-contributors/', get_all_archived_contributors_view, name='archived_contributors'),
+    path('export-contributors/', export_contributors_view, name='export_contributors'),
 # 
     # # 🌐 Platform Availability
     path('add-track-platform-availability/', add_platform_availability, name='add_platform_availability'),
+    path('add-track-platform-availabilities/', add_platform_availabilities, name='add_platform_availabilities'),
     path('get-all-platform-availability/', get_all_platform_availability_view, name='get_all_platform_availability'),
     path('get-track-platform-availability-details/', get_platform_availability_details_view, name='get_platform_availability_details'),
     # path('edit/', edit_platform_availability, name='edit_platform_availability'),
@@ -1,22 +1,21 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.api.artist_views import is_valid_email, check_email_exist
+from accounts.api.custom_jwt import CustomJWTAuthentication
 from artists.models import Album, Artist
+from core.pagination import keyset_paginate
 
 User = get_user_model()
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def add_album(request):
     payload = {}
     data = {}
@@ -69,14 +68,15 @@ def add_album(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_albums_view(request):
     payload = {}
     data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     albums = Album.objects.filter(is_archived=False)
@@ -85,28 +85,21 @@ def get_all_albums_view(request):
         albums = albums.filter(
             Q(title__icontains=search_query) |
             Q(upc_code__icontains=search_query) |
-            Q(artist__name__icontains=search_query) |
+            Q(artist_name__icontains=search_query) |
             Q(artist__stage_name__icontains=search_query)
         )
 
-    paginator = Paginator(albums, page_size)
-    try:
-        paginated_albums = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_albums = paginator.page(1)
-    except EmptyPage:
-        paginated_albums = paginator.page(paginator.num_pages)
+    paginated_albums, next_cursor = keyset_paginate(albums, cursor, page_size)
 
-    from ..serializers import AlbumSerializer
-    serializer = AlbumSerializer(paginated_albums, many=True)
+    from ..serializers import AlbumListSerializer
+    serializer = AlbumListSerializer(paginated_albums, many=True)
 
     data['albums'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated_albums.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_albums.next_page_number() if paginated_albums.has_next() else None,
-        'previous': paginated_albums.previous_page_number() if paginated_albums.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (albums.count() + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -122,7 +115,7 @@ def get_all_albums_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_album_details_view(request):
     payload = {}
     data = {}
@@ -156,7 +149,7 @@ def get_album_details_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def edit_album(request):
     payload = {}
     data = {}
@@ -220,7 +213,7 @@ def edit_album(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def archive_album(request):
     payload = {}
     errors = {}
@@ -250,7 +243,7 @@ def archive_album(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def unarchive_album(request):
     payload = {}
     errors = {}
@@ -280,7 +273,7 @@ def unarchive_album(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def delete_album(request):
     payload = {}
     errors = {}
@@ -310,14 +303,15 @@ def delete_album(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_archived_albums_view(request):
     payload = {}
     data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     albums = Album.objects.filter(is_archived=True)
@@ -326,27 +320,20 @@ def get_all_archived_albums_view(request):
         albums = albums.filter(
             Q(title__icontains=search_query) |
             Q(upc_code__icontains=search_query) |
-            Q(artist__name__icontains=search_query)
+            Q(artist_name__icontains=search_query)
         )
 
-    paginator = Paginator(albums, page_size)
-    try:
-        paginated_albums = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_albums = paginator.page(1)
-    except EmptyPage:
-        paginated_albums = paginator.page(paginator.num_pages)
+    paginated_albums, next_cursor = keyset_paginate(albums, cursor, page_size)
 
-    from ..serializers import AlbumSerializer
-    serializer = AlbumSerializer(paginated_albums, many=True)
+    from ..serializers import AlbumListSerializer
+    serializer = AlbumListSerializer(paginated_albums, many=True)
 
     data['albums'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated_albums.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_albums.next_page_number() if paginated_albums.has_next() else None,
-        'previous': paginated_albums.previous_page_number() if paginated_albums.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (albums.count() + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -1,22 +1,80 @@
 
+import hashlib
+
+import orjson
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from artists.models import Artist
+from accounts.api.custom_jwt import CustomJWTAuthentication
+from artists.models import Artist, ArtistProfile, bump_artist_list_version, get_artist_list_version
+from core.pagination import keyset_paginate
+from core.renderers import ORJSONRenderer
+from core.search import trigram_search
 
 User = get_user_model()
 
+ARTIST_LIST_CACHE_TIMEOUT = 60
+ARTIST_LIST_FIELDS = ('artist_id', 'name', 'stage_name', 'active', 'updated_at')
+
+
+def artist_list_item(row):
+    return {field: row[field] for field in ARTIST_LIST_FIELDS}
+
+
+def artist_list_payload(rows):
+    return [artist_list_item(row) for row in rows]
+
+
+def get_artist_list_data(is_archived, search_query, cursor, with_count, page_size=10):
+    """
+    One page of the artist list, cached per query for ARTIST_LIST_CACHE_TIMEOUT.
+    Keys embed the artist list version, so any artist write retires them all.
+    :param is_archived:
+    :param search_query:
+    :param cursor:
+    :param with_count:
+    :param page_size:
+    :return:
+    """
+    key_source = "{}|{}|{}|{}".format(is_archived, search_query, cursor, with_count)
+    key = "artist_list:{}:{}".format(
+        get_artist_list_version(), hashlib.blake2b(key_source.encode(), digest_size=16).hexdigest()
+    )
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    all_artists = Artist.objects.filter(is_archived=is_archived).values('id', 'created_at', *ARTIST_LIST_FIELDS)
+
+    if search_query:
+        all_artists = trigram_search(all_artists, ['name', 'stage_name', 'profile__bio'], search_query)
+
+    artists, next_cursor = keyset_paginate(all_artists, cursor, page_size)
+
+    data = {
+        'artists': artist_list_payload(artists),
+        'pagination': {
+            'next_cursor': next_cursor,
+        },
+    }
+    if with_count:
+        data['pagination']['total_pages'] = (all_artists.count() + page_size - 1) // page_size
+
+    cache.set(key, data, ARTIST_LIST_CACHE_TIMEOUT)
+    return data
+
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def add_artist(request):
     payload = {}
     data = {}
@@ -37,9 +95,8 @@ def add_artist(request):
     if not name:
         errors['name'] = ['Artist name is required.']
 
-    try:
-        user = User.objects.get(user_id=user_id)
-    except:
+    user_pk = User.objects.filter(user_id=user_id).values_list('pk', flat=True).first()
+    if user_pk is None:
         errors['user_id'] = ['User ID does not exist.']
 
 
@@ -48,20 +105,23 @@ def add_artist(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    artist = Artist.objects.create(
-        user=user,
-        name=name,
-        stage_name=stage_name,
-        bio=bio,
-        profile_image=profile_image,
-        spotify_url=spotify_url,
-        shazam_url=shazam_url,
-        instagram=instagram,
-        twitter=twitter,
-        website=website,
-        contact_email=contact_email,
-  
-    )
+    with transaction.atomic():
+        artist = Artist.objects.create(
+            user_id=user_pk,
+            name=name,
+            stage_name=stage_name,
+        )
+        ArtistProfile.objects.create(
+            artist=artist,
+            bio=bio,
+            profile_image=profile_image,
+            spotify_url=spotify_url,
+            shazam_url=shazam_url,
+            instagram=instagram,
+            twitter=twitter,
+            website=website,
+            contact_email=contact_email,
+        )
 
     data["artist_id"] = artist.artist_id
     data["name"] = artist.name
@@ -76,43 +136,17 @@ def add_artist(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
+@renderer_classes([ORJSONRenderer])
 def get_all_artists_view(request):
     payload = {}
-    data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
 
-    all_artists = Artist.objects.filter(is_archived=False)
-
-    if search_query:
-        all_artists = all_artists.filter(
-            Q(name__icontains=search_query) |
-            Q(stage_name__icontains=search_query) |
-            Q(bio__icontains=search_query)
-        )
-
-    paginator = Paginator(all_artists, page_size)
-    try:
-        paginated_artists = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_artists = paginator.page(1)
-    except EmptyPage:
-        paginated_artists = paginator.page(paginator.num_pages)
-
-    from ..serializers import ArtistSerializer  # Make sure you have this
-    serializer = ArtistSerializer(paginated_artists, many=True)
-
-    data['artists'] = serializer.data
-    data['pagination'] = {
-        'page_number': paginated_artists.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_artists.next_page_number() if paginated_artists.has_next() else None,
-        'previous': paginated_artists.previous_page_number() if paginated_artists.has_previous() else None,
-    }
+    data = get_artist_list_data(False, search_query, cursor, with_count)
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -126,7 +160,7 @@ def get_all_artists_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_artist_details_view(request):
     payload = {}
     data = {}
@@ -138,7 +172,7 @@ def get_artist_details_view(request):
         errors['artist_id'] = ["Artist ID is required"]
 
     try:
-        artist = Artist.objects.get(artist_id=artist_id)
+        artist = Artist.objects.select_related('profile').get(artist_id=artist_id)
     except Artist.DoesNotExist:
         errors['artist_id'] = ['Artist does not exist']
 
@@ -161,7 +195,7 @@ def get_artist_details_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def edit_artist(request):
     payload = {}
     data = {}
@@ -171,9 +205,8 @@ def edit_artist(request):
     if not artist_id:
         errors['artist_id'] = ['Artist ID is required.']
 
-    try:
-        artist = Artist.objects.get(artist_id=artist_id)
-    except Artist.DoesNotExist:
+    artist = Artist.objects.filter(artist_id=artist_id).only('id', 'artist_id', 'name').first()
+    if artist is None:
         errors['artist'] = ['Artist not found.']
 
     if errors:
@@ -181,16 +214,19 @@ def edit_artist(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    fields_to_update = [
-        'name', 'stage_name', 'bio', 'profile_image', 'spotify_url',
-        'shazam_url', 'instagram', 'twitter', 'website', 'contact_email', 'active'
-    ]
-    for field in fields_to_update:
-        value = request.data.get(field)
-        if value is not None:
-            setattr(artist, field, value)
+    changed = [field for field in ['name', 'stage_name', 'active'] if request.data.get(field) is not None]
+    for field in changed:
+        setattr(artist, field, request.data.get(field))
+
+    if changed:
+        artist.save(update_fields=changed + ['updated_at'])
 
-    artist.save()
+    profile_changed = [field for field in ArtistProfile.FIELDS if request.data.get(field) is not None]
+    if profile_changed:
+        profile, _ = ArtistProfile.objects.only('id', 'artist_id').get_or_create(artist_id=artist.pk)
+        for field in profile_changed:
+            setattr(profile, field, request.data.get(field))
+        profile.save(update_fields=profile_changed)
 
     data["artist_id"] = artist.id
     data["name"] = artist.name
@@ -205,7 +241,7 @@ def edit_artist(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def archive_artist(request):
     payload = {}
     errors = {}
@@ -214,18 +250,18 @@ def archive_artist(request):
     if not artist_id:
         errors['artist_id'] = ['Artist ID is required.']
 
-    try:
-        artist = Artist.objects.get(artist_id=artist_id)
-    except Artist.DoesNotExist:
-        errors['artist'] = ['Artist not found.']
-
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    artist.is_archived = True
-    artist.save()
+    updated = Artist.objects.filter(artist_id=artist_id).update(is_archived=True, updated_at=timezone.now())
+    if not updated:
+        payload['message'] = "Errors"
+        payload['errors'] = {'artist': ['Artist not found.']}
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    bump_artist_list_version()
 
     payload['message'] = "Successful"
     return Response(payload)
@@ -234,7 +270,7 @@ def archive_artist(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def unarchive_artist(request):
     payload = {}
     errors = {}
@@ -243,18 +279,18 @@ def unarchive_artist(request):
     if not artist_id:
         errors['artist_id'] = ['Artist ID is required.']
 
-    try:
-        artist = Artist.objects.get(artist_id=artist_id)
-    except Artist.DoesNotExist:
-        errors['artist'] = ['Artist not found.']
-
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    artist.is_archived = False
-    artist.save()
+    updated = Artist.objects.filter(artist_id=artist_id).update(is_archived=False, updated_at=timezone.now())
+    if not updated:
+        payload['message'] = "Errors"
+        payload['errors'] = {'artist': ['Artist not found.']}
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    bump_artist_list_version()
 
     payload['message'] = "Successful"
     return Response(payload)
@@ -263,7 +299,7 @@ def unarchive_artist(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def delete_artist(request):
     payload = {}
     errors = {}
@@ -289,43 +325,17 @@ def delete_artist(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
+@renderer_classes([ORJSONRenderer])
 def get_all_archived_artists_view(request):
     payload = {}
-    data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
-
-    all_artists = Artist.objects.filter(is_archived=True)
-
-    if search_query:
-        all_artists = all_artists.filter(
-            Q(name__icontains=search_query) |
-            Q(stage_name__icontains=search_query) |
-            Q(bio__icontains=search_query)
-        )
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
 
-    paginator = Paginator(all_artists, page_size)
-    try:
-        paginated_artists = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_artists = paginator.page(1)
-    except EmptyPage:
-        paginated_artists = paginator.page(paginator.num_pages)
-
-    from ..serializers import ArtistSerializer  # Make sure you have this
-    serializer = ArtistSerializer(paginated_artists, many=True)
-
-    data['artists'] = serializer.data
-    data['pagination'] = {
-        'page_number': paginated_artists.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_artists.next_page_number() if paginated_artists.has_next() else None,
-        'previous': paginated_artists.previous_page_number() if paginated_artists.has_previous() else None,
-    }
+    data = get_artist_list_data(True, search_query, cursor, with_count)
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -333,3 +343,16 @@ def get_all_archived_artists_view(request):
     return Response(payload, status=status.HTTP_200_OK)
 
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([CustomJWTAuthentication])
+def export_artists_view(request):
+    is_archived = request.query_params.get('archived') == '1'
+
+    rows = Artist.objects.filter(is_archived=is_archived).order_by('-created_at').values(
+        *ARTIST_LIST_FIELDS
+    ).iterator(chunk_size=2000)
+
+    lines = (orjson.dumps(artist_list_item(row), option=orjson.OPT_NAIVE_UTC) + b'\n' for row in rows)
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
@@ -1,22 +1,82 @@
 
+import hashlib
+
+import orjson
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.db.models import Q
+from django.core.cache import cache
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.api.artist_views import is_valid_email, check_email_exist
-from artists.models import Album, Artist, Contributor, Genre, Track
+from accounts.api.custom_jwt import CustomJWTAuthentication
+from artists.models import Album, Artist, Contributor, Genre, Track, bump_list_version, get_list_version
+from core.pagination import cached_count, keyset_paginate
+from core.search import trigram_search
 
 User = get_user_model()
 
+VALID_ROLES = frozenset(dict(Contributor.ROLE_CHOICES))
+
+LIST_CACHE_TIMEOUT = 60
+CONTRIBUTOR_LIST_FIELDS = ('id', 'name', 'role', 'track', 'is_archived', 'active', 'created_at', 'updated_at')
+
+
+def contributor_list_item(row):
+    item = {field: row[field] for field in CONTRIBUTOR_LIST_FIELDS}
+    item['track_title'] = row['track_title']
+    return item
+
+
+def get_contributor_list_data(is_archived, search_query, cursor, with_count, page_size=10):
+    """
+    One page of the contributor list, cached per query for LIST_CACHE_TIMEOUT.
+    Keys embed the contributor list version, which contributor/track writes bump.
+    :param is_archived:
+    :param search_query:
+    :param cursor:
+    :param with_count:
+    :param page_size:
+    :return:
+    """
+    key_source = "{}|{}|{}|{}|{}".format(is_archived, search_query, cursor, with_count, page_size)
+    key = "contributor_list:{}:{}".format(
+        get_list_version('contributor'), hashlib.blake2b(key_source.encode(), digest_size=16).hexdigest()
+    )
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    contributors = Contributor.objects.filter(is_archived=is_archived).values(
+        *CONTRIBUTOR_LIST_FIELDS, track_title=F('track__title')
+    )
+
+    if search_query:
+        contributors = trigram_search(contributors, ['name', 'role', 'track__title'], search_query)
+
+    paginated_contributors, next_cursor = keyset_paginate(contributors, cursor, page_size)
+
+    data = {
+        'contributors': [contributor_list_item(row) for row in paginated_contributors],
+        'pagination': {
+            'next_cursor': next_cursor,
+        },
+    }
+    if with_count:
+        count_key = 'contributors:{}:{}'.format('archived' if is_archived else 'active', search_query)
+        total = cached_count(contributors, count_key, refresh=not cursor)
+        data['pagination']['total_pages'] = (total + page_size - 1) // page_size
+
+    cache.set(key, data, LIST_CACHE_TIMEOUT)
+    return data
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def add_contributor(request):
     payload = {}
     data = {}
@@ -32,14 +92,12 @@ def add_contributor(request):
         errors['role'] = ['Role is required.']
     if not track_id:
         errors['track_id'] = ['Track ID is required.']
+    else:
+        track = Track.objects.filter(track_id=track_id).first()
+        if track is None:
+            errors['track'] = ['Track not found.']
 
-    try:
-        track = Track.objects.get(track_id=track_id)
-    except Track.DoesNotExist:
-        errors['track'] = ['Track not found.']
-
-    valid_roles = dict(Contributor.ROLE_CHOICES).keys()
-    if role and role not in valid_roles:
+    if role and role not in VALID_ROLES:
         errors['role'] = ['Invalid role selected.']
 
     if errors:
@@ -65,47 +123,76 @@ def add_contributor(request):
 
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([CustomJWTAuthentication])
+def add_contributors(request):
+    payload = {}
+    data = {}
+    errors = {}
+
+    track_id = request.data.get('track_id', '')
+    contributors = request.data.get('contributors', [])
+
+    if not track_id:
+        errors['track_id'] = ['Track ID is required.']
+    else:
+        track_pk = Track.objects.filter(track_id=track_id).values_list('pk', flat=True).first()
+        if track_pk is None:
+            errors['track'] = ['Track not found.']
+
+    if not contributors or not isinstance(contributors, list):
+        errors['contributors'] = ['A list of contributors is required.']
+    else:
+        contributor_errors = []
+        for index, contributor in enumerate(contributors, start=1):
+            if not isinstance(contributor, dict) or not contributor.get('name'):
+                contributor_errors.append(f'Contributor {index}: Name is required.')
+            elif not isinstance(contributor.get('role'), str) or contributor['role'] not in VALID_ROLES:
+                contributor_errors.append(f'Contributor {index}: Invalid role selected.')
+        if contributor_errors:
+            errors['contributors'] = contributor_errors
+
+    if errors:
+        payload['message'] = "Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    created = Contributor.objects.bulk_create(
+        [
+            Contributor(name=contributor['name'], role=contributor['role'], track_id=track_pk, active=True)
+            for contributor in contributors
+        ],
+        batch_size=500,
+    )
+    # bulk_create sends no post_save, so retire the cached list pages here
+    bump_list_version('contributor')
+
+    data['contributors'] = [
+        {'contributor_id': contributor.id, 'name': contributor.name, 'role': contributor.role}
+        for contributor in created
+    ]
+
+    payload['message'] = "Successful"
+    payload['data'] = data
+    return Response(payload)
+
+
+
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_contributors_view(request):
     payload = {}
-    data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
 
-    contributors = Contributor.objects.filter(is_archived=False)
-
-    if search_query:
-        contributors = contributors.filter(
-            Q(name__icontains=search_query) |
-            Q(role__icontains=search_query) |
-            Q(track__title__icontains=search_query)
-        )
-
-    paginator = Paginator(contributors, page_size)
-    try:
-        paginated_contributors = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_contributors = paginator.page(1)
-    except EmptyPage:
-        paginated_contributors = paginator.page(paginator.num_pages)
-
-    from ..serializers import ContributorSerializer
-    serializer = ContributorSerializer(paginated_contributors, many=True)
-
-    data['contributors'] = serializer.data
-    data['pagination'] = {
-        'page_number': paginated_contributors.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_contributors.next_page_number() if paginated_contributors.has_next() else None,
-        'previous': paginated_contributors.previous_page_number() if paginated_contributors.has_previous() else None,
-    }
+    data = get_contributor_list_data(False, search_query, cursor, with_count)
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -114,7 +201,7 @@ def get_all_contributors_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_contributor_details_view(request):
     payload = {}
     errors = {}
@@ -123,11 +210,10 @@ def get_contributor_details_view(request):
 
     if not contributor_id:
         errors['contributor_id'] = ['Contributor ID is required.']
-
-    try:
-        contributor = Contributor.objects.get(id=contributor_id)
-    except Contributor.DoesNotExist:
-        errors['contributor'] = ['Contributor not found.']
+    else:
+        contributor = Contributor.objects.select_related('track').filter(id=contributor_id).first()
+        if contributor is None:
+            errors['contributor'] = ['Contributor not found.']
 
     if errors:
         payload['message'] = "Errors"
@@ -145,7 +231,7 @@ def get_contributor_details_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def edit_contributor(request):
     payload = {}
     data = {}
@@ -155,11 +241,10 @@ def edit_contributor(request):
 
     if not contributor_id:
         errors['contributor_id'] = ['Contributor ID is required.']
-
-    try:
-        contributor = Contributor.objects.get(id=contributor_id)
-    except Contributor.DoesNotExist:
-        errors['contributor'] = ['Contributor not found.']
+    else:
+        contributor = Contributor.objects.filter(id=contributor_id).first()
+        if contributor is None:
+            errors['contributor'] = ['Contributor not found.']
 
     if errors:
         payload['message'] = "Errors"
@@ -170,29 +255,34 @@ def edit_contributor(request):
     role = request.data.get('role')
     track_id = request.data.get('track_id')
 
+    changed = ['updated_at']
+
     if name:
         contributor.name = name
+        changed.append('name')
 
     if role:
-        valid_roles = dict(Contributor.ROLE_CHOICES).keys()
-        if role in valid_roles:
+        if role in VALID_ROLES:
             contributor.role = role
+            changed.append('role')
         else:
             errors['role'] = ['Invalid role selected.']
 
     if track_id:
-        try:
-            track = Track.objects.get(track_id=track_id)
-            contributor.track = track
-        except Track.DoesNotExist:
+        track_pk = Track.objects.filter(track_id=track_id).values_list('pk', flat=True).first()
+        if track_pk is None:
             errors['track'] = ['Track not found.']
+        else:
+            contributor.track_id = track_pk
+            changed.append('track')
 
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    contributor.save()
+    # Only write the columns that changed; post_save still fires for the list cache
+    contributor.save(update_fields=changed)
 
     data['contributor_id'] = contributor.id
     data['name'] = contributor.name
@@ -207,13 +297,13 @@ def edit_contributor(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def archive_contributor(request):
     return toggle_contributor_archive_state(request, True)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def unarchive_contributor(request):
     return toggle_contributor_archive_state(request, False)
 
@@ -226,18 +316,18 @@ def toggle_contributor_archive_state(request, state):
     if not contributor_id:
         errors['contributor_id'] = ['Contributor ID is required.']
 
-    try:
-        contributor = Contributor.objects.get(id=contributor_id)
-    except Contributor.DoesNotExist:
-        errors['contributor'] = ['Contributor not found.']
-
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    contributor.is_archived = state
-    contributor.save()
+    updated = Contributor.objects.filter(id=contributor_id).update(is_archived=state, updated_at=timezone.now())
+    if not updated:
+        payload['message'] = "Errors"
+        payload['errors'] = {'contributor': ['Contributor not found.']}
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    bump_list_version('contributor')
 
     payload['message'] = "Successful"
     return Response(payload)
@@ -250,7 +340,7 @@ def toggle_contributor_archive_state(request, state):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def delete_contributor(request):
     payload = {}
     errors = {}
@@ -259,11 +349,10 @@ def delete_contributor(request):
 
     if not contributor_id:
         errors['contributor_id'] = ['Contributor ID is required.']
-
-    try:
-        contributor = Contributor.objects.get(id=contributor_id)
-    except Contributor.DoesNotExist:
-        errors['contributor'] = ['Contributor not found.']
+    else:
+        contributor = Contributor.objects.filter(id=contributor_id).first()
+        if contributor is None:
+            errors['contributor'] = ['Contributor not found.']
 
     if errors:
         payload['message'] = "Errors"
@@ -288,44 +377,32 @@ def delete_contributor(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_archived_contributors_view(request):
     payload = {}
-    data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
-
-    contributors = Contributor.objects.filter(is_archived=True)
-
-    if search_query:
-        contributors = contributors.filter(
-            Q(name__icontains=search_query) |
-            Q(role__icontains=search_query) |
-            Q(track__title__icontains=search_query)
-        )
-
-    paginator = Paginator(contributors, page_size)
-    try:
-        paginated_contributors = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_contributors = paginator.page(1)
-    except EmptyPage:
-        paginated_contributors = paginator.page(paginator.num_pages)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
 
-    from ..serializers import ContributorSerializer
-    serializer = ContributorSerializer(paginated_contributors, many=True)
-
-    data['contributors'] = serializer.data
-    data['pagination'] = {
-        'page_number': paginated_contributors.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_contributors.next_page_number() if paginated_contributors.has_next() else None,
-        'previous': paginated_contributors.previous_page_number() if paginated_contributors.has_previous() else None,
-    }
+    data = get_contributor_list_data(True, search_query, cursor, with_count)
 
     payload['message'] = "Successful"
     payload['data'] = data
     return Response(payload)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([CustomJWTAuthentication])
+def export_contributors_view(request):
+    is_archived = request.query_params.get('archived') == '1'
+
+    rows = Contributor.objects.filter(is_archived=is_archived).order_by('-created_at').values(
+        *CONTRIBUTOR_LIST_FIELDS, track_title=F('track__title')
+    ).iterator(chunk_size=2000)
+
+    lines = (orjson.dumps(contributor_list_item(row), option=orjson.OPT_NAIVE_UTC) + b'\n' for row in rows)
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
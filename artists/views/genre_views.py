@@ -1,25 +1,22 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.api.artist_views import is_valid_email, check_email_exist
+from accounts.api.custom_jwt import CustomJWTAuthentication
 from artists.models import Artist, Genre
+from core.pagination import keyset_paginate
 
 User = get_user_model()
 
 
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -30,7 +27,7 @@ User = get_user_model()
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def add_genre(request):
     payload = {}
     data = {}
@@ -60,14 +57,15 @@ def add_genre(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_genres_view(request):
     payload = {}
     data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     all_genres = Genre.objects.filter(is_archived=False)
@@ -75,24 +73,17 @@ def get_all_genres_view(request):
     if search_query:
         all_genres = all_genres.filter(name__icontains=search_query)
 
-    paginator = Paginator(all_genres, page_size)
-    try:
-        paginated_genres = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_genres = paginator.page(1)
-    except EmptyPage:
-        paginated_genres = paginator.page(paginator.num_pages)
+    paginated_genres, next_cursor = keyset_paginate(all_genres, cursor, page_size)
 
     from ..serializers import GenreSerializer  # make sure to create this
     serializer = GenreSerializer(paginated_genres, many=True)
 
     data['genres'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated_genres.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_genres.next_page_number() if paginated_genres.has_next() else None,
-        'previous': paginated_genres.previous_page_number() if paginated_genres.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (all_genres.count() + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -103,7 +94,7 @@ def get_all_genres_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_genre_details_view(request):
     payload = {}
     data = {}
@@ -136,7 +127,7 @@ def get_genre_details_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def edit_genre(request):
     payload = {}
     data = {}
@@ -172,7 +163,7 @@ def edit_genre(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def archive_genre(request):
     payload = {}
     errors = {}
@@ -201,7 +192,7 @@ def archive_genre(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def unarchive_genre(request):
     payload = {}
     errors = {}
@@ -231,7 +222,7 @@ def unarchive_genre(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def delete_genre(request):
     payload = {}
     errors = {}
@@ -260,14 +251,15 @@ def delete_genre(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_archived_genres_view(request):
     payload = {}
     data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     genres = Genre.objects.filter(is_archived=True)
@@ -275,24 +267,17 @@ def get_all_archived_genres_view(request):
     if search_query:
         genres = genres.filter(name__icontains=search_query)
 
-    paginator = Paginator(genres, page_size)
-    try:
-        paginated_genres = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_genres = paginator.page(1)
-    except EmptyPage:
-        paginated_genres = paginator.page(paginator.num_pages)
+    paginated_genres, next_cursor = keyset_paginate(genres, cursor, page_size)
 
     from ..serializers import GenreSerializer
     serializer = GenreSerializer(paginated_genres, many=True)
 
     data['genres'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated_genres.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_genres.next_page_number() if paginated_genres.has_next() else None,
-        'previous': paginated_genres.previous_page_number() if paginated_genres.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (genres.count() + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
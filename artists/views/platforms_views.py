@@ -1,21 +1,22 @@
 
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.api.artist_views import is_valid_email, check_email_exist
+from accounts.api.custom_jwt import CustomJWTAuthentication
 from artists.models import Album, Artist, Genre, PlatformAvailability, Track
+from core.pagination import keyset_paginate
 
 User = get_user_model()
 
+VALID_PLATFORMS = frozenset(dict(PlatformAvailability.PLATFORM_CHOICES))
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def add_platform_availability(request):
     payload = {}
     data = {}
@@ -64,6 +65,60 @@ def add_platform_availability(request):
 
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([CustomJWTAuthentication])
+def add_platform_availabilities(request):
+    payload = {}
+    data = {}
+    errors = {}
+
+    track_id = request.data.get('track_id', '')
+    platforms = request.data.get('platforms', [])
+
+    if not track_id:
+        errors['track_id'] = ['Track ID is required.']
+    else:
+        track_pk = Track.objects.filter(track_id=track_id).values_list('pk', flat=True).first()
+        if track_pk is None:
+            errors['track'] = ['Track not found.']
+
+    if not platforms or not isinstance(platforms, list):
+        errors['platforms'] = ['A list of platforms is required.']
+    else:
+        platform_errors = []
+        for index, entry in enumerate(platforms, start=1):
+            if not isinstance(entry, dict) or not isinstance(entry.get('platform'), str) or entry['platform'] not in VALID_PLATFORMS:
+                platform_errors.append(f'Platform {index}: Invalid platform selected.')
+            elif not isinstance(entry.get('url'), str) or not entry['url']:
+                platform_errors.append(f'Platform {index}: Platform URL is required.')
+        if platform_errors:
+            errors['platforms'] = platform_errors
+
+    if errors:
+        payload['message'] = "Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    created = PlatformAvailability.objects.bulk_create(
+        [
+            PlatformAvailability(track_id=track_pk, platform=entry['platform'], url=entry['url'], active=True)
+            for entry in platforms
+        ],
+        batch_size=500,
+    )
+
+    data['platforms'] = [
+        {'id': availability.id, 'platform': availability.platform, 'url': availability.url}
+        for availability in created
+    ]
+
+    payload['message'] = "Successful"
+    payload['data'] = data
+    return Response(payload)
+
+
+
 
 
 
@@ -73,13 +128,14 @@ def add_platform_availability(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_platform_availability_view(request):
     payload = {}
     data = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     availabilities = PlatformAvailability.objects.filter(is_archived=False)
@@ -90,24 +146,17 @@ def get_all_platform_availability_view(request):
             Q(track__title__icontains=search_query)
         )
 
-    paginator = Paginator(availabilities, page_size)
-    try:
-        paginated = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated = paginator.page(1)
-    except EmptyPage:
-        paginated = paginator.page(paginator.num_pages)
+    paginated, next_cursor = keyset_paginate(availabilities, cursor, page_size)
 
     from ..serializers import PlatformAvailabilitySerializer
     serializer = PlatformAvailabilitySerializer(paginated, many=True)
 
     data['availabilities'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated.next_page_number() if paginated.has_next() else None,
-        'previous': paginated.previous_page_number() if paginated.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (availabilities.count() + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -116,7 +165,7 @@ def get_all_platform_availability_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_platform_availability_details_view(request):
     payload = {}
     errors = {}
@@ -147,7 +196,7 @@ def get_platform_availability_details_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def edit_platform_availability(request):
     payload = {}
     data = {}
@@ -211,13 +260,13 @@ def edit_platform_availability(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def archive_platform_availability(request):
     return toggle_availability_archive_state(request, True)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def unarchive_platform_availability(request):
     return toggle_availability_archive_state(request, False)
 
@@ -250,7 +299,7 @@ def toggle_availability_archive_state(request, state):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def delete_platform_availability(request):
     payload = {}
     errors = {}
@@ -279,13 +328,14 @@ def delete_platform_availability(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_archived_platform_availability_view(request):
     payload = {}
     data = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     archived = PlatformAvailability.objects.filter(is_archived=True)
@@ -296,24 +346,17 @@ def get_all_archived_platform_availability_view(request):
             Q(track__title__icontains=search_query)
         )
 
-    paginator = Paginator(archived, page_size)
-    try:
-        paginated = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated = paginator.page(1)
-    except EmptyPage:
-        paginated = paginator.page(paginator.num_pages)
+    paginated, next_cursor = keyset_paginate(archived, cursor, page_size)
 
     from ..serializers import PlatformAvailabilitySerializer
     serializer = PlatformAvailabilitySerializer(paginated, many=True)
 
     data['availabilities'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated.next_page_number() if paginated.has_next() else None,
-        'previous': paginated.previous_page_number() if paginated.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (archived.count() + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -1,21 +1,112 @@
 
+import hashlib
+
+import orjson
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.duration import duration_string
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from accounts.api.artist_views import is_valid_email, check_email_exist
-from artists.models import Album, Artist, Genre, Track
+from accounts.api.custom_jwt import CustomJWTAuthentication
+from artists.models import Album, Artist, Track, bump_list_version, get_genre_names, get_list_version
+from core.pagination import cached_count, keyset_paginate
+from core.search import trigram_search
 
 User = get_user_model()
 
+LIST_CACHE_TIMEOUT = 60
+
+# Track list rows are built straight from .values(); no audio_file URL or lyrics,
+# those come from the details endpoint
+TRACK_LIST_FIELDS = (
+    'id', 'track_id', 'title', 'artist', 'artist_name', 'album', 'genre',
+    'release_date', 'isrc_code', 'duration', 'explicit', 'fingerprinted', 'royalty_amount',
+    'is_archived', 'active', 'created_at', 'updated_at',
+)
+
+
+def track_list_item(row, genre_names):
+    """
+    Shape a .values() row the way TrackSerializer renders it (duration string, decimal as str).
+    :param row:
+    :param genre_names:
+    :return:
+    """
+    item = {field: row[field] for field in TRACK_LIST_FIELDS}
+    item['album_title'] = row['album_title']
+    item['genre_name'] = genre_names.get(row['genre'])
+    if item['duration'] is not None:
+        item['duration'] = duration_string(item['duration'])
+    item['royalty_amount'] = str(item['royalty_amount'])
+    return item
+
+
+def known_genre_id(genre_id):
+    """
+    Check a genre id against the cached genre table instead of querying for the row.
+    :param genre_id:
+    :return: the id as an int, or None if there is no such genre
+    """
+    try:
+        genre_id = int(genre_id)
+    except (TypeError, ValueError):
+        return None
+    return genre_id if genre_id in get_genre_names() else None
+
+
+def get_track_list_data(is_archived, search_query, cursor, with_count, page_size=10):
+    """
+    One page of the track list, cached per query for LIST_CACHE_TIMEOUT.
+    Keys embed the track list version, which track/album/genre writes bump.
+    :param is_archived:
+    :param search_query:
+    :param cursor:
+    :param with_count:
+    :param page_size:
+    :return:
+    """
+    key_source = "{}|{}|{}|{}|{}".format(is_archived, search_query, cursor, with_count, page_size)
+    key = "track_list:{}:{}".format(
+        get_list_version('track'), hashlib.blake2b(key_source.encode(), digest_size=16).hexdigest()
+    )
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    tracks = Track.objects.filter(is_archived=is_archived).values(*TRACK_LIST_FIELDS, album_title=F('album__title'))
+
+    if search_query:
+        search_fields = ['title', 'isrc_code', 'artist_name'] if is_archived else ['title', 'isrc_code', 'artist_name', 'album__title']
+        tracks = trigram_search(tracks, search_fields, search_query)
+
+    paginated_tracks, next_cursor = keyset_paginate(tracks, cursor, page_size)
+
+    genre_names = get_genre_names()
+
+    data = {
+        'tracks': [track_list_item(row, genre_names) for row in paginated_tracks],
+        'pagination': {
+            'next_cursor': next_cursor,
+        },
+    }
+    if with_count:
+        count_key = 'tracks:{}:{}'.format('archived' if is_archived else 'active', search_query)
+        total = cached_count(tracks, count_key, refresh=not cursor)
+        data['pagination']['total_pages'] = (total + page_size - 1) // page_size
+
+    cache.set(key, data, LIST_CACHE_TIMEOUT)
+    return data
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def add_track(request):
     payload = {}
     data = {}
@@ -39,45 +130,55 @@ def add_track(request):
         errors['release_date'] = ['Release date is required.']
     if not isrc_code:
         errors['isrc_code'] = ['ISRC code is required.']
-    elif Track.objects.filter(isrc_code=isrc_code).exists():
-        errors['isrc_code'] = ['ISRC code already exists.']
     if not genre_id:
         errors['genre_id'] = ['Genre is required.']
 
-    try:
-        artist = Artist.objects.get(artist_id=artist_id)
-    except Artist.DoesNotExist:
-        errors['artist'] = ['Artist not found.']
+    if artist_id:
+        artist = Artist.objects.filter(artist_id=artist_id).first()
+        if artist is None:
+            errors['artist'] = ['Artist not found.']
 
     album = None
     if album_id:
-        try:
-            album = Album.objects.get(id=album_id)
-        except Album.DoesNotExist:
+        album = Album.objects.filter(id=album_id).first()
+        if album is None:
             errors['album'] = ['Album not found.']
 
-    try:
-        genre = Genre.objects.get(id=genre_id)
-    except Genre.DoesNotExist:
-        errors['genre'] = ['Genre not found.']
+    if genre_id:
+        genre_id = known_genre_id(genre_id)
+        if genre_id is None:
+            errors['genre'] = ['Genre not found.']
 
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    track = Track.objects.create(
-        title=title,
-        artist=artist,
-        album=album,
-        release_date=release_date,
-        isrc_code=isrc_code,
-        genre=genre,
-        lyrics=lyrics,
-        explicit=explicit,
-        audio_file=audio_file,
-        active=True
-    )
+    # isrc_code is unique, so the insert itself is the duplicate check
+    try:
+        with transaction.atomic():
+            track = Track.objects.create(
+                title=title,
+                artist=artist,
+                album=album,
+                release_date=release_date,
+                isrc_code=isrc_code,
+                genre_id=genre_id,
+                lyrics=lyrics,
+                explicit=explicit,
+                audio_file=audio_file,
+                active=True
+            )
+    except IntegrityError:
+        # FK checks are deferred to commit too, so only blame the ISRC when it's really taken
+        # (the album or a cached genre may have been deleted in the meantime)
+        if Track.objects.filter(isrc_code=isrc_code).exists():
+            errors['isrc_code'] = ['ISRC code already exists.']
+        else:
+            errors['track'] = ['Track could not be saved.']
+        payload['message'] = "Errors"
+        payload['errors'] = errors
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
     data['track_id'] = track.id
     data['title'] = track.title
@@ -95,44 +196,16 @@ def add_track(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_tracks_view(request):
     payload = {}
-    data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
 
-    tracks = Track.objects.filter(is_archived=False)
-
-    if search_query:
-        tracks = tracks.filter(
-            Q(title__icontains=search_query) |
-            Q(isrc_code__icontains=search_query) |
-            Q(artist__name__icontains=search_query) |
-            Q(album__title__icontains=search_query)
-        )
-
-    paginator = Paginator(tracks, page_size)
-    try:
-        paginated_tracks = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_tracks = paginator.page(1)
-    except EmptyPage:
-        paginated_tracks = paginator.page(paginator.num_pages)
-
-    from ..serializers import TrackSerializer
-    serializer = TrackSerializer(paginated_tracks, many=True)
-
-    data['tracks'] = serializer.data
-    data['pagination'] = {
-        'page_number': paginated_tracks.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_tracks.next_page_number() if paginated_tracks.has_next() else None,
-        'previous': paginated_tracks.previous_page_number() if paginated_tracks.has_previous() else None,
-    }
+    data = get_track_list_data(False, search_query, cursor, with_count)
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -142,7 +215,7 @@ def get_all_tracks_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_track_details_view(request):
     payload = {}
     errors = {}
@@ -151,19 +224,18 @@ def get_track_details_view(request):
 
     if not track_id:
         errors['track_id'] = ['Track ID is required.']
-
-    try:
-        track = Track.objects.get(track_id=track_id)
-    except Track.DoesNotExist:
-        errors['track'] = ['Track not found.']
+    else:
+        track = Track.objects.with_related().with_credits().filter(track_id=track_id).first()
+        if track is None:
+            errors['track'] = ['Track not found.']
 
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    from ..serializers import TrackSerializer
-    serializer = TrackSerializer(track, many=False)
+    from ..serializers import TrackDetailsSerializer
+    serializer = TrackDetailsSerializer(track, many=False)
 
     payload['message'] = "Successful"
     payload['data'] = serializer.data
@@ -173,7 +245,7 @@ def get_track_details_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def edit_track(request):
     payload = {}
     data = {}
@@ -183,11 +255,10 @@ def edit_track(request):
 
     if not track_id:
         errors['track_id'] = ['Track ID is required.']
-
-    try:
-        track = Track.objects.get(track_id=track_id)
-    except Track.DoesNotExist:
-        errors['track'] = ['Track not found.']
+    else:
+        track = Track.objects.filter(track_id=track_id).first()
+        if track is None:
+            errors['track'] = ['Track not found.']
 
     if errors:
         payload['message'] = "Errors"
@@ -206,27 +277,27 @@ def edit_track(request):
 
     artist_id = request.data.get('artist_id', None)
     if artist_id:
-        try:
-            artist = Artist.objects.get(artist_id=artist_id)
-            track.artist = artist
-        except Artist.DoesNotExist:
+        artist = Artist.objects.filter(artist_id=artist_id).first()
+        if artist is None:
             errors['artist'] = ['Artist not found.']
+        else:
+            track.artist = artist
 
     album_id = request.data.get('album_id', None)
     if album_id:
-        try:
-            album = Album.objects.get(id=album_id)
-            track.album = album
-        except Album.DoesNotExist:
+        album = Album.objects.filter(id=album_id).first()
+        if album is None:
             errors['album'] = ['Album not found.']
+        else:
+            track.album = album
 
     genre_id = request.data.get('genre_id', None)
     if genre_id:
-        try:
-            genre = Genre.objects.get(id=genre_id)
-            track.genre = genre
-        except Genre.DoesNotExist:
+        genre_id = known_genre_id(genre_id)
+        if genre_id is None:
             errors['genre'] = ['Genre not found.']
+        else:
+            track.genre_id = genre_id
 
     if errors:
         payload['message'] = "Errors"
@@ -246,14 +317,14 @@ def edit_track(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def archive_track(request):
     return toggle_track_archive_state(request, True)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def unarchive_track(request):
     return toggle_track_archive_state(request, False)
 
@@ -267,18 +338,18 @@ def toggle_track_archive_state(request, state):
     if not track_id:
         errors['track_id'] = ['Track ID is required.']
 
-    try:
-        track = Track.objects.get(track_id=track_id)
-    except Track.DoesNotExist:
-        errors['track'] = ['Track not found.']
-
     if errors:
         payload['message'] = "Errors"
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    track.is_archived = state
-    track.save()
+    updated = Track.objects.filter(track_id=track_id).update(is_archived=state, updated_at=timezone.now())
+    if not updated:
+        payload['message'] = "Errors"
+        payload['errors'] = {'track': ['Track not found.']}
+        return Response(payload, status=status.HTTP_400_BAD_REQUEST)
+
+    bump_list_version('track')
 
     payload['message'] = "Successful"
     return Response(payload)
@@ -288,7 +359,7 @@ def toggle_track_archive_state(request, state):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def delete_track(request):
     payload = {}
     errors = {}
@@ -297,11 +368,10 @@ def delete_track(request):
 
     if not track_id:
         errors['track_id'] = ['Track ID is required.']
-
-    try:
-        track = Track.objects.get(track_id=track_id)
-    except Track.DoesNotExist:
-        errors['track'] = ['Track not found.']
+    else:
+        track = Track.objects.filter(track_id=track_id).first()
+        if track is None:
+            errors['track'] = ['Track not found.']
 
     if errors:
         payload['message'] = "Errors"
@@ -317,44 +387,33 @@ def delete_track(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_all_archived_tracks_view(request):
     payload = {}
-    data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
-    page_size = 10
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
 
-    tracks = Track.objects.filter(is_archived=True)
-
-    if search_query:
-        tracks = tracks.filter(
-            Q(title__icontains=search_query) |
-            Q(isrc_code__icontains=search_query) |
-            Q(artist__name__icontains=search_query)
-        )
-
-    paginator = Paginator(tracks, page_size)
-    try:
-        paginated_tracks = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_tracks = paginator.page(1)
-    except EmptyPage:
-        paginated_tracks = paginator.page(paginator.num_pages)
-
-    from ..serializers import TrackSerializer
-    serializer = TrackSerializer(paginated_tracks, many=True)
-
-    data['tracks'] = serializer.data
-    data['pagination'] = {
-        'page_number': paginated_tracks.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_tracks.next_page_number() if paginated_tracks.has_next() else None,
-        'previous': paginated_tracks.previous_page_number() if paginated_tracks.has_previous() else None,
-    }
+    data = get_track_list_data(True, search_query, cursor, with_count)
 
     payload['message'] = "Successful"
     payload['data'] = data
     return Response(payload)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([CustomJWTAuthentication])
+def export_tracks_view(request):
+    is_archived = request.query_params.get('archived') == '1'
+    genre_names = get_genre_names()
+
+    rows = Track.objects.filter(is_archived=is_archived).order_by('-created_at').values(
+        *TRACK_LIST_FIELDS, album_title=F('album__title')
+    ).iterator(chunk_size=2000)
+
+    lines = (orjson.dumps(track_list_item(row, genre_names), option=orjson.OPT_NAIVE_UTC) + b'\n' for row in rows)
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
@@ -2,10 +2,11 @@
 
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db import transaction
+from accounts.api.custom_jwt import CustomJWTAuthentication
+from core.pagination import cached_count, keyset_paginate
 from .serializers import (
     TransactionSerializer,
     DepositSerializer,
@@ -19,7 +20,7 @@ User = get_user_model()
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def get_account_balance_view(request, account_id):
     try:
         bank_account = BankAccount.objects.get(account_id=account_id)
@@ -32,14 +33,15 @@ def get_account_balance_view(request, account_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def list_transactions_view(request, account_id):
     payload = {}
     data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     try:
@@ -48,31 +50,25 @@ def list_transactions_view(request, account_id):
         errors['message'] = "Bank account not found"
         return Response(errors, status=status.HTTP_404_NOT_FOUND)
 
-    transactions = bank_account.transactions.all().order_by("-timestamp")
+    transactions = bank_account.transactions.all()
 
     if search_query:
         transactions = transactions.filter(
             description__icontains=search_query
         )
 
-    paginator = Paginator(transactions, page_size)
-
-    try:
-        paginated_transactions = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_transactions = paginator.page(1)
-    except EmptyPage:
-        paginated_transactions = paginator.page(paginator.num_pages)
+    paginated_transactions, next_cursor = keyset_paginate(transactions, cursor, page_size, field='timestamp')
 
     transactions_serializer = TransactionSerializer(paginated_transactions, many=True)
 
     data['transactions'] = transactions_serializer.data
     data['pagination'] = {
-        'page_number': paginated_transactions.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_transactions.next_page_number() if paginated_transactions.has_next() else None,
-        'previous': paginated_transactions.previous_page_number() if paginated_transactions.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        count_key = 'transactions:{}:{}'.format(bank_account.pk, search_query)
+        total = cached_count(transactions, count_key, refresh=not cursor)
+        data['pagination']['total_pages'] = (total + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -81,14 +77,15 @@ def list_transactions_view(request, account_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def client_list_transactions_view(request, user_id):
     payload = {}
     data = {}
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     try:
@@ -101,7 +98,7 @@ def client_list_transactions_view(request, user_id):
     except BankAccount.DoesNotExist:
         errors['user_id'] = ['Bank Account does not exist.']
 
-    transactions = bank_account.transactions.all().order_by("-timestamp")
+    transactions = bank_account.transactions.all()
 
     balance = bank_account.balance
     account_id = bank_account.account_id
@@ -114,24 +111,18 @@ def client_list_transactions_view(request, user_id):
             description__icontains=search_query
         )
 
-    paginator = Paginator(transactions, page_size)
-
-    try:
-        paginated_transactions = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated_transactions = paginator.page(1)
-    except EmptyPage:
-        paginated_transactions = paginator.page(paginator.num_pages)
+    paginated_transactions, next_cursor = keyset_paginate(transactions, cursor, page_size, field='timestamp')
 
     transactions_serializer = TransactionSerializer(paginated_transactions, many=True)
 
     data['transactions'] = transactions_serializer.data
     data['pagination'] = {
-        'page_number': paginated_transactions.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated_transactions.next_page_number() if paginated_transactions.has_next() else None,
-        'previous': paginated_transactions.previous_page_number() if paginated_transactions.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        count_key = 'transactions:{}:{}'.format(bank_account.pk, search_query)
+        total = cached_count(transactions, count_key, refresh=not cursor)
+        data['pagination']['total_pages'] = (total + page_size - 1) // page_size
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -140,7 +131,7 @@ def client_list_transactions_view(request, user_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def deposit_view(request, account_id):
     try:
         account = BankAccount.objects.get(account_id=account_id)
@@ -158,7 +149,7 @@ def deposit_view(request, account_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def withdraw_view(request, account_id):
     try:
         account = BankAccount.objects.get(account_id=account_id)
@@ -176,7 +167,7 @@ def withdraw_view(request, account_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def transfer_view(request, account_id):
     try:
         from_account = BankAccount.objects.get(account_id=account_id)
@@ -194,9 +185,10 @@ def transfer_view(request, account_id):
         except BankAccount.DoesNotExist:
             return Response({'message': 'Destination account not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if from_account.withdraw(amount, f'Transfer to {to_account_id}'):
-            to_account.deposit(amount, f'Transfer from {account_id}')
-            return Response({'message': 'Transfer successful'}, status=status.HTTP_200_OK)
+        with transaction.atomic():
+            if from_account.withdraw(amount, f'Transfer to {to_account_id}'):
+                to_account.deposit(amount, f'Transfer from {account_id}')
+                return Response({'message': 'Transfer successful'}, status=status.HTTP_200_OK)
         return Response({'message': 'Transfer failed'}, status=status.HTTP_400_BAD_REQUEST)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -204,7 +196,7 @@ def transfer_view(request, account_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def client_deposit_view(request, user_id):
     errors = {}
     payload = {}
@@ -244,7 +236,7 @@ def client_deposit_view(request, user_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CustomJWTAuthentication])
 def client_withdraw_view(request, user_id):
 
 
@@ -1,14 +1,16 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models.signals import pre_save
+
+from core.utils import generate_account_id, generate_transaction_id
 
 
 
 class BankAccount(models.Model):
 
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='bank_accounts')
-    account_id = models.CharField(max_length=20, unique=True)
+    account_id = models.CharField(max_length=20, unique=True, default=generate_account_id)
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
 
     created_at = models.DateTimeField(default=timezone.now)
@@ -19,36 +21,74 @@ class BankAccount(models.Model):
         return f"{self.user.first_name} {self.user.last_name} - {self.account_id}"
 
     def deposit(self, amount, description=None):
-        if amount > 0:
-            self.balance += amount
-            self.save()
+        if amount <= 0:
+            return False
+        with transaction.atomic():
+            BankAccount.objects.filter(pk=self.pk).update(balance=F('balance') + amount, updated_at=timezone.now())
             Transaction.objects.create(
                 bank_account=self,
                 transaction_type='Deposit',
                 amount=amount,
                 description=description
             )
-            return True
-        return False
+        self.refresh_from_db(fields=['balance', 'updated_at'])
+        return True
 
     def withdraw(self, amount, description=None):
-        if 0 < amount <= self.balance:
-            self.balance -= amount
-            self.save()
+        if amount <= 0:
+            return False
+        with transaction.atomic():
+            # The balance check and the debit happen in one UPDATE, so concurrent withdrawals can't overdraw
+            updated = BankAccount.objects.filter(pk=self.pk, balance__gte=amount).update(
+                balance=F('balance') - amount, updated_at=timezone.now()
+            )
+            if not updated:
+                return False
             Transaction.objects.create(
                 bank_account=self,
                 transaction_type='Withdrawal',
                 amount=amount,
                 description=description
             )
-            return True
-        return False
+        self.refresh_from_db(fields=['balance', 'updated_at'])
+        return True
+
+    def bulk_apply(self, entries):
+        """
+        Apply a batch of deposits/withdrawals with one balance UPDATE and one
+        multi-row INSERT for the ledger, e.g. for payout runs.
+        All or nothing: nothing is written if an amount isn't positive, a type is
+        unknown, or the net change would overdraw the account.
+        :param entries: iterable of (transaction_type, amount, description),
+            transaction_type being 'Deposit' or 'Withdrawal'
+        :return: True if the batch was applied
+        """
+        signs = {'Deposit': 1, 'Withdrawal': -1}
+        transactions = []
+        net = 0
+        for transaction_type, amount, description in entries:
+            if transaction_type not in signs or amount <= 0:
+                return False
+            net += signs[transaction_type] * amount
+            transactions.append(Transaction(
+                bank_account=self,
+                transaction_type=transaction_type,
+                amount=amount,
+                description=description
+            ))
+        if not transactions:
+            return False
 
-def pre_save_account_id_receiver(sender, instance, *args, **kwargs):
-    if not instance.account_id:
-        instance.account_id = unique_account_id_generator(instance)
+        with transaction.atomic():
+            accounts = BankAccount.objects.filter(pk=self.pk)
+            if net < 0:
+                accounts = accounts.filter(balance__gte=-net)
+            if not accounts.update(balance=F('balance') + net, updated_at=timezone.now()):
+                return False
+            Transaction.objects.bulk_create(transactions, batch_size=500)
+        self.refresh_from_db(fields=['balance', 'updated_at'])
+        return True
 
-pre_save.connect(pre_save_account_id_receiver, sender=BankAccount)
 
 class Transaction(models.Model):
     TRANSACTION_TYPES = [
@@ -58,20 +98,17 @@ class Transaction(models.Model):
     ]
 
     bank_account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='transactions')
-    transaction_id = models.CharField(max_length=20, unique=True)
+    transaction_id = models.CharField(max_length=20, unique=True, default=generate_transaction_id)
 
     transaction_type = models.CharField(max_length=50, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     timestamp = models.DateTimeField(default=timezone.now)
     description = models.TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['bank_account', '-timestamp', '-id'], name='txn_account_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.transaction_id} - {self.bank_account.account_id} - {self.transaction_type} - {self.amount}"
-
-
-
-def pre_save_transaction_id_receiver(sender, instance, *args, **kwargs):
-    if not instance.transaction_id:
-        instance.transaction_id = unique_transaction_id_generator(instance)
-
-pre_save.connect(pre_save_transaction_id_receiver, sender=Transaction)
\ No newline at end of file
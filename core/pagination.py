@@ -0,0 +1,81 @@
+import base64
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(obj, field='created_at'):
+    """
+    Opaque cursor for the row after which the next page starts.
+    obj is a model instance or a .values() dict containing field and id.
+    :param obj:
+    :param field:
+    :return:
+    """
+    if isinstance(obj, dict):
+        created_at, pk = obj[field], obj['id']
+    else:
+        created_at, pk = getattr(obj, field), obj.pk
+    raw = "{}|{}".format(created_at.isoformat(), pk)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor; returns (created_at, pk) or None for a bad cursor.
+    :param cursor:
+    :return:
+    """
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except ValueError:
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def keyset_paginate(qs, cursor, page_size, field='created_at'):
+    """
+    Page through qs newest first by (field, id) without OFFSET or COUNT.
+    field defaults to created_at; pass e.g. 'timestamp' for models without one.
+    Fetches one extra row to know whether there is a next page.
+    :param qs:
+    :param cursor:
+    :param page_size:
+    :param field:
+    :return: (rows, next_cursor)
+    """
+    qs = qs.order_by('-' + field, '-id')
+
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, pk = position
+        qs = qs.filter(Q(**{field + '__lt': created_at}) | Q(**{field: created_at, 'id__lt': pk}))
+
+    rows = list(qs[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1], field) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def cached_count(qs, key, refresh=False, timeout=60):
+    """
+    qs.count() cached under key for timeout seconds, so paging through a
+    filtered list doesn't re-run COUNT(*) for every page.
+    Pass refresh=True (e.g. on the first page) to recount.
+    :param qs:
+    :param key:
+    :param refresh:
+    :param timeout:
+    :return:
+    """
+    key = "count:" + hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    count = None if refresh else cache.get(key)
+    if count is None:
+        count = qs.count()
+        cache.set(key, count, timeout)
+    return count
@@ -0,0 +1,59 @@
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+
+def trigram_search(qs, fields, query, rank=False):
+    """
+    Filter qs to rows where any of fields contains query (icontains, on every
+    backend, so dev and prod return the same rows). On PostgreSQL the ILIKE
+    '%query%' scans are served by the gin_trgm_ops indexes from
+    create_trigram_indexes. Results keep the queryset's ordering unless rank is
+    set, which on PostgreSQL matches by pg_trgm word similarity instead and orders
+    by it; callers that keyset-paginate re-order anyway and should leave it off.
+    :param qs:
+    :param fields:
+    :param query:
+    :param rank:
+    :return:
+    """
+    lookup = Q()
+
+    if not rank or connections[qs.db].vendor != 'postgresql':
+        for field in fields:
+            lookup |= Q(**{field + '__icontains': query})
+        return qs.filter(lookup)
+
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    for field in fields:
+        lookup |= Q(**{field + '__trigram_word_similar': query})
+
+    similarities = [TrigramWordSimilarity(query, field) for field in fields]
+    similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+
+    return qs.filter(lookup).annotate(similarity=similarity).order_by('-similarity')
+
+
+def create_trigram_indexes(using, table, columns):
+    """
+    Create GIN trigram indexes for the given columns on PostgreSQL.
+    Migrations are regenerated per environment in this project, so this runs
+    from post_migrate instead of living in a migration file.
+    :param using:
+    :param table:
+    :param columns:
+    :return:
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in columns:
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)".format(
+                    table=table, column=column
+                )
+            )
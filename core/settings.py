@@ -51,10 +51,10 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
         "channels",
     "rest_framework",
-    "rest_framework.authtoken",
     "corsheaders",
 
     "accounts",
@@ -167,6 +167,14 @@ CELERY_BROKER_URL = "redis://redis:6379"
 CELERY_RESULT_BACKEND = "redis://redis:6379"
 
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://redis:6379",
+    }
+}
+
+
 from celery import Celery
 
 app = Celery("core")
@@ -191,6 +199,8 @@ CORS_ALLOW_CREDENTIALS = True
 
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+# Reverse proxies in front of the app that append to X-Forwarded-For (see core.utils.get_client_ip)
+NUM_PROXIES = int(os.environ.get('NUM_PROXIES', '1'))
 
 
 
@@ -206,6 +216,7 @@ FINGERPRINT_REDUCTION = 32  # Size of the hash (first N characters)
 PEAK_SORT = True  # Whether to sort peaks before hashing
 CONNECTIVITY_MASK = 2  # Mask used for peak neighborhood
 PEAK_NEIGHBORHOOD_SIZE = 2  # Size of the neighborhood for peak detection
+FINGERPRINT_WORKERS = int(os.environ.get('FINGERPRINT_WORKERS', '0'))  # Processes for fingerprinting long tracks (0/1 = serial; Celery prefork workers always run serial)
 
 
 
@@ -1,92 +1,61 @@
 import random
-import re
+import secrets
 import string
 
 from django.conf import settings
+from django.core.cache import cache
+
+_ID_CHARS = string.ascii_uppercase + string.digits
+_UPPERS = frozenset(string.ascii_uppercase)
+_LOWERS = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+_SPECIALS = frozenset('-!@#$%^&*_()+=/.,<>?"~`£{}|:;')
 
 
 def random_string_generator(size=10, chars=string.ascii_lowercase + string.digits):
-    return "".join(random.choice(chars) for _ in range(size))
+    return "".join(random.choices(chars, k=size))
 
 
 def generate_random_otp_code():
-    code = ""
-    for i in range(4):
-        code += str(random.randint(0, 9))
-    return code
+    return f"{secrets.randbelow(10000):04d}"
 
 
-def unique_user_id_generator(instance):
+def generate_user_id():
     """
-    This is for a django project with a user_id field
-    :param instance:
+    Default for User.user_id: 24 bytes from secrets (192 bits), so no
+    existence check is needed; the unique constraint is the backstop.
     :return:
     """
-
-    size = random.randint(30, 45)
-    user_id = random_string_generator(size=size)
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(user_id=user_id).exists()
-    if qs_exists:
-        return
-    return user_id
-
+    return secrets.token_urlsafe(24)
 
 
-
-def unique_admin_id_generator(instance):
+def generate_admin_id():
     """
-    This is for a admin_id field
-    :param instance:
+    Default for MrAdmin.admin_id, see generate_artist_id.
     :return:
     """
-    size = random.randint(5, 10)
-    admin_id = "AD-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-IN"
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(admin_id=admin_id).exists()
-    if qs_exists:
-        return None
-    return admin_id
+    return "AD-" + "".join(secrets.choice(_ID_CHARS) for _ in range(10)) + "-IN"
 
 
-def unique_artist_id_generator(instance):
+def generate_artist_id():
     """
-    This is for a artist_id field
-    :param instance:
+    Default for Artist.artist_id. Ten random characters from a CSPRNG
+    (36**10 combinations) make a collision negligible, so no lookup is needed.
     :return:
     """
-    size = random.randint(5, 10)
-    artist_id = "AR-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-ST"
+    return "AR-" + "".join(secrets.choice(_ID_CHARS) for _ in range(10)) + "-ST"
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(artist_id=artist_id).exists()
-    if qs_exists:
-        return None
-    return artist_id
 
-def unique_track_id_generator(instance):
+def generate_track_id():
     """
-    This is for a track_id field
-    :param instance:
+    Default for Track.track_id, see generate_artist_id.
     :return:
     """
-    size = random.randint(5, 10)
-    track_id = "TR-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-CK"
-
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(track_id=track_id).exists()
-    if qs_exists:
-        return None
-    return track_id
+    return "TR-" + "".join(secrets.choice(_ID_CHARS) for _ in range(10)) + "-CK"
 
 
 def generate_email_token():
-    code = ""
-    for i in range(4):
-        code += str(random.randint(0, 9))
-    return code
+    return f"{secrets.randbelow(10000):04d}"
 
 
 def unique_ref_number_generator():
@@ -105,54 +74,68 @@ def unique_ticket_number_generator():
 
 
 
-def is_valid_email(email):
-    # Regular expression pattern for basic email validation
-    pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-
-    # Using re.match to check if the email matches the pattern
-    if re.match(pattern, email):
-        return True
-    else:
-        return False
-
-
 def is_valid_password(password):
     # Check for at least 8 characters
     if len(password) < 8:
         return False
 
-    # Check for at least one uppercase letter
-    if not re.search(r'[A-Z]', password):
-        return False
+    # One C-level pass to build the character set, then a disjointness test per class
+    chars = set(password)
+    return not (
+        chars.isdisjoint(_UPPERS)
+        or chars.isdisjoint(_LOWERS)
+        or chars.isdisjoint(_DIGITS)
+        or chars.isdisjoint(_SPECIALS)
+    )
 
-    # Check for at least one lowercase letter
-    if not re.search(r'[a-z]', password):
-        return False
 
-    # Check for at least one digit
-    if not re.search(r'[0-9]', password):
-        return False
 
-    # Check for at least one special character
-    if not re.search(r'[-!@#\$%^&*_()-+=/.,<>?"~`£{}|:;]', password):
-        return False
 
-    return True
+def generate_account_id():
+    """
+    Default for BankAccount.account_id, see generate_artist_id.
+    :return:
+    """
+    return "ACC-" + "".join(secrets.choice(_ID_CHARS) for _ in range(10)) + "-(BNK)"
 
 
+def generate_transaction_id():
+    """
+    Default for Transaction.transaction_id, see generate_artist_id.
+    :return:
+    """
+    return "TX-" + "".join(secrets.choice(_ID_CHARS) for _ in range(12))
 
 
-def unique_account_id_generator(instance):
+def is_rate_limited(key, limit=3, timeout=60):
     """
-    This is for a account_id field
-    :param instance:
+    Counts a hit against key in the cache and reports whether more than
+    limit hits have landed inside the timeout window.
+    :param key:
+    :param limit:
+    :param timeout:
     :return:
     """
-    size = random.randint(5, 7)
-    account_id = "ACC-" + random_string_generator(size=size, chars=string.ascii_uppercase + string.digits) + "-(BNK)"
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key) > limit
+    except ValueError:
+        cache.set(key, 1, timeout)
+        return False
+
 
-    Klass = instance.__class__
-    qs_exists = Klass.objects.filter(account_id=account_id).exists()
-    if qs_exists:
-        return None
-    return account_id
\ No newline at end of file
+def get_client_ip(request):
+    """
+    The client address as seen by the outermost of settings.NUM_PROXIES trusted
+    reverse proxies: each proxy appends the peer it saw to X-Forwarded-For, so
+    only the last NUM_PROXIES entries can be trusted and the first of those is
+    the client. Falls back to REMOTE_ADDR when there is no proxy or header.
+    :param request:
+    :return:
+    """
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if settings.NUM_PROXIES and forwarded_for:
+        addresses = [address.strip() for address in forwarded_for.split(',') if address.strip()]
+        if addresses:
+            return addresses[-min(settings.NUM_PROXIES, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
@@ -1,31 +1,113 @@
-import hashlib
-from operator import itemgetter
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import List, Tuple
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.ndimage.filters import maximum_filter
 from scipy.ndimage.morphology import generate_binary_structure, iterate_structure, binary_erosion
-import matplotlib.mlab as mlab
 from django.conf import settings
 
+try:
+    import torch
+except ImportError:  # optional: only the batch ingest worker benefits from a GPU
+    torch = None
+
+# Below this many samples (~23s at 44.1 kHz, i.e. match queries) host<->GPU copies outweigh cuFFT
+GPU_STFT_MIN_SAMPLES = 1_000_000
+
+# Spectrogram frames owned by each worker when fingerprinting in parallel (~47s at the default window)
+PARALLEL_CHUNK_FRAMES = 1024
+
+
 def fingerprint(channel_samples: List[int], Fs: int = settings.DEFAULT_FS, wsize: int = settings.DEFAULT_WINDOW_SIZE,
                 wratio: float = settings.DEFAULT_OVERLAP_RATIO, fan_value: int = settings.DEFAULT_FAN_VALUE,
-                amp_min: int = settings.DEFAULT_AMP_MIN) -> List[Tuple[str, int]]:
+                amp_min: int = settings.DEFAULT_AMP_MIN) -> List[Tuple[int, int]]:
     """
     Generate fingerprints from audio samples.
     """
+    noverlap = int(wsize * wratio)
+    hop = wsize - noverlap
+    n_frames = (len(channel_samples) - wsize) // hop + 1
+    gpu = torch is not None and len(channel_samples) > GPU_STFT_MIN_SAMPLES and torch.cuda.is_available()
+
+    # Get 2D peaks from the spectrogram, fanned out over time chunks for long tracks
+    # (serial inside daemonic processes such as Celery prefork workers, which can't fork children)
+    if (settings.FINGERPRINT_WORKERS > 1 and n_frames > 2 * PARALLEL_CHUNK_FRAMES and not gpu
+            and not in_daemon_process()):
+        freqs, times = parallel_peaks(np.asarray(channel_samples), Fs, wsize, noverlap, amp_min, n_frames)
+    else:
+        freqs, times = spectrogram_peaks(channel_samples, Fs, wsize, noverlap, amp_min)
+
+    # Generate and return hashes
+    return generate_hashes(freqs, times, fan_value=fan_value)
+
+
+def in_daemon_process() -> bool:
+    """
+    Whether this process is daemonic (multiprocessing or Celery's billiard pool
+    worker) and so may not start the worker processes of parallel_peaks.
+    """
+    if multiprocessing.current_process().daemon:
+        return True
+    try:
+        from billiard.process import current_process as billiard_current_process
+    except ImportError:
+        return False
+    return bool(billiard_current_process().daemon)
+
+
+def spectrogram_peaks(channel_samples: List[int], Fs: int, wsize: int, noverlap: int,
+                      amp_min: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Log spectrogram of the samples and its 2D peaks, as (freqs, times).
+    """
     # Compute the spectrogram
-    arr2D = mlab.specgram(channel_samples, NFFT=wsize, Fs=Fs, window=mlab.window_hanning,
-                          noverlap=int(wsize * wratio))[0]
+    arr2D = specgram(channel_samples, wsize=wsize, Fs=Fs, noverlap=noverlap)
 
-    # Apply log transform
-    arr2D = 10 * np.log10(arr2D, out=np.zeros_like(arr2D), where=(arr2D != 0))
+    # Apply log transform in place (zero bins stay 0)
+    np.log10(arr2D, out=arr2D, where=(arr2D != 0))
+    arr2D *= 10
 
-    # Get 2D peaks from the spectrogram
-    local_maxima = get_2D_peaks(arr2D, amp_min=amp_min)
+    return get_2D_peaks(arr2D, amp_min=amp_min)
 
-    # Generate and return hashes
-    return generate_hashes(local_maxima, fan_value=fan_value)
 
+def chunk_peaks(args) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Peaks of one time chunk, with times shifted to whole-track frames and only
+    those inside the chunk's own [start, stop) frame range kept.
+    """
+    samples, first_frame, start, stop, Fs, wsize, noverlap, amp_min = args
+    freqs, times = spectrogram_peaks(samples, Fs, wsize, noverlap, amp_min)
+    times += first_frame
+    keep = (times >= start) & (times < stop)
+    return freqs[keep], times[keep]
+
+
+def parallel_peaks(samples: np.ndarray, Fs: int, wsize: int, noverlap: int, amp_min: int,
+                   n_frames: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Same peaks as spectrogram_peaks on the whole track, computed per chunk of
+    PARALLEL_CHUNK_FRAMES frames in settings.FINGERPRINT_WORKERS processes.
+    Each chunk is decoded with a margin of neighborhood frames on both sides so the
+    peak filter sees the same cells at its owned frames as on the full spectrogram.
+    """
+    hop = wsize - noverlap
+    margin = settings.PEAK_NEIGHBORHOOD_SIZE + 1
+    jobs = []
+    for start in range(0, n_frames, PARALLEL_CHUNK_FRAMES):
+        stop = min(start + PARALLEL_CHUNK_FRAMES, n_frames)
+        first = max(start - margin, 0)
+        last = min(stop + margin, n_frames)
+        chunk = samples[first * hop:(last - 1) * hop + wsize]
+        jobs.append((chunk, first, start, stop, Fs, wsize, noverlap, amp_min))
+
+    with ProcessPoolExecutor(max_workers=settings.FINGERPRINT_WORKERS) as executor:
+        results = list(executor.map(chunk_peaks, jobs))
+
+    # Chunks own disjoint frame ranges; generate_hashes' time sort (PEAK_SORT) restores the serial order
+    return (np.concatenate([freqs for freqs, _ in results]),
+            np.concatenate([times for _, times in results]))
 
 
 
@@ -34,32 +116,98 @@ def fingerprint(channel_samples: List[int], Fs: int = settings.DEFAULT_FS, wsize
 
 
 
-def get_2D_peaks(arr2D: np.array, plot: bool = False, amp_min: int = settings.DEFAULT_AMP_MIN) -> List[Tuple[int, int]]:
+
+@lru_cache(maxsize=8)
+def hann_window(wsize: int) -> Tuple[np.ndarray, float]:
+    """
+    Hann window of wsize samples and its power (sum of squares), built once per size.
+    """
+    window = np.hanning(wsize)
+    power = float((window ** 2).sum())
+    window = window.astype(np.float32)
+    window.flags.writeable = False
+    return window, power
+
+
+def gpu_power_spectrum(samples: np.ndarray, window: np.ndarray, hop: int) -> np.ndarray:
+    """
+    |rfft|^2 of each windowed frame (frames x bins), computed with cuFFT.
+    Same framing as the CPU path: no centering/padding, frames every hop samples.
+    """
+    device = torch.device('cuda')
+    x = torch.from_numpy(samples).to(device)
+    spectrum = torch.stft(
+        x, n_fft=len(window), hop_length=hop, window=torch.from_numpy(window.copy()).to(device),
+        center=False, onesided=True, return_complex=True,
+    )
+    return (spectrum.real ** 2 + spectrum.imag ** 2).T.cpu().numpy()
+
+
+def specgram(channel_samples: List[int], wsize: int, Fs: int, noverlap: int) -> np.ndarray:
+    """
+    One-sided PSD spectrogram (freq x time), numerically the same as
+    matplotlib.mlab.specgram with window_hanning and default scaling, but framed
+    with a strided view and transformed with a single batched rfft.
+    Frames and window are float32 to halve the bandwidth of the windowing pass.
+    """
+    samples = np.asarray(channel_samples, dtype=np.float32)
+    if len(samples) < wsize:
+        samples = np.pad(samples, (0, wsize - len(samples)))
+
+    window, window_power = hann_window(wsize)
+    hop = wsize - noverlap
+    if torch is not None and len(samples) > GPU_STFT_MIN_SAMPLES and torch.cuda.is_available():
+        psd = gpu_power_spectrum(samples, window, hop)
+    else:
+        frames = sliding_window_view(samples, wsize)[::hop]
+        spectrum = np.fft.rfft(frames * window, axis=1)
+        psd = spectrum.real ** 2 + spectrum.imag ** 2
+
+    # Fold in the negative frequencies: every bin but DC (and Nyquist for even sizes) doubles
+    if wsize % 2:
+        psd[:, 1:] *= 2
+    else:
+        psd[:, 1:-1] *= 2
+    psd /= Fs * window_power
+    return psd.T
+
+
+def get_2D_peaks(arr2D: np.array, plot: bool = False, amp_min: int = settings.DEFAULT_AMP_MIN) -> Tuple[np.ndarray, np.ndarray]:
     """
     Extract maximum peaks from the spectrogram matrix (arr2D).
+    Returns the peaks as parallel int32 arrays (freqs, times).
     """
     # Create binary structure for neighborhood filter
     struct = generate_binary_structure(2, settings.CONNECTIVITY_MASK)
     neighborhood = iterate_structure(struct, settings.PEAK_NEIGHBORHOOD_SIZE)
 
-    # Find local maxima
-    local_max = maximum_filter(arr2D, footprint=neighborhood) == arr2D
+    # Only cells above the minimum amplitude can be peaks: crop to their bounding box, plus the
+    # neighborhood radius so the filters see the same cells there as on the full spectrogram
+    above = arr2D > amp_min
+    rows = np.flatnonzero(above.any(axis=1))
+    cols = np.flatnonzero(above.any(axis=0))
+    if not rows.size:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty
+    radius = settings.PEAK_NEIGHBORHOOD_SIZE
+    row0, col0 = max(rows[0] - radius, 0), max(cols[0] - radius, 0)
+    region = (slice(row0, rows[-1] + radius + 1), slice(col0, cols[-1] + radius + 1))
+    cropped, above = arr2D[region], above[region]
 
-    # Apply erosion to remove noise
-    background = (arr2D == 0)
-    eroded_background = binary_erosion(background, structure=neighborhood, border_value=1)
-
-    # Boolean mask of true peaks
-    detected_peaks = local_max != eroded_background
+    # Find local maxima
+    detected_peaks = maximum_filter(cropped, footprint=neighborhood) == cropped
 
-    # Extract frequencies and times of detected peaks
-    amps = arr2D[detected_peaks]
-    freqs, times = np.where(detected_peaks)
+    if amp_min < 0:
+        # Eroded background cells are exactly 0, so they only matter if 0 can pass the amplitude filter
+        background = (cropped == 0)
+        eroded_background = binary_erosion(background, structure=neighborhood, border_value=1)
+        np.not_equal(detected_peaks, eroded_background, out=detected_peaks)
 
-    # Filter peaks by minimum amplitude
-    filter_idxs = np.where(amps > amp_min)
-    freqs_filter = freqs[filter_idxs]
-    times_filter = times[filter_idxs]
+    # Keep peaks above the minimum amplitude
+    detected_peaks &= above
+    freqs_filter, times_filter = np.nonzero(detected_peaks)
+    freqs_filter += row0
+    times_filter += col0
 
     if plot:
         import matplotlib.pyplot as plt
@@ -68,7 +216,7 @@ def get_2D_peaks(arr2D: np.array, plot: bool = False, amp_min: int = settings.DE
         plt.gca().invert_yaxis()
         plt.show()
 
-    return list(zip(freqs_filter, times_filter))
+    return freqs_filter.astype(np.int32), times_filter.astype(np.int32)
 
 
 
@@ -78,28 +226,85 @@ def get_2D_peaks(arr2D: np.array, plot: bool = False, amp_min: int = settings.DE
 
 
 
-def generate_hashes(peaks: List[Tuple[int, int]], fan_value: int = settings.DEFAULT_FAN_VALUE) -> List[Tuple[str, int]]:
+def peak_pairs(freqs: np.ndarray, times: np.ndarray, fan_value: int, min_delta: int, max_delta: int):
+    """
+    All (freq1, freq2, t_delta, t1) pairs of each peak with its next fan_value - 1
+    peaks whose time delta is within [min_delta, max_delta], as four int arrays.
+    Built one fan step at a time over whole arrays instead of per peak.
+    """
+    freq1, freq2, t_delta, t1 = [], [], [], []
+    for j in range(1, fan_value):
+        delta = times[j:] - times[:-j]
+        mask = (delta >= min_delta) & (delta <= max_delta)
+        freq1.append(freqs[:-j][mask])
+        freq2.append(freqs[j:][mask])
+        t_delta.append(delta[mask])
+        t1.append(times[:-j][mask])
+    if not t1:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    return np.concatenate(freq1), np.concatenate(freq2), np.concatenate(t_delta), np.concatenate(t1)
+
+
+def pair_keys(freq1: np.ndarray, freq2: np.ndarray, t_delta: np.ndarray) -> np.ndarray:
+    """
+    64-bit fingerprint key per pair: the triple packed into 48 bits
+    (16 bits each) and scrambled with the splitmix64/murmur3 finalizer.
+    The finalizer is a bijection, so distinct triples never collide.
+    """
+    mask16 = np.uint64(0xFFFF)
+    x = (freq1.astype(np.uint64) & mask16) << np.uint64(32)
+    x |= (freq2.astype(np.uint64) & mask16) << np.uint64(16)
+    x |= t_delta.astype(np.int64).astype(np.uint64) & mask16
+    x ^= x >> np.uint64(33)
+    x *= np.uint64(0xff51afd7ed558ccd)
+    x ^= x >> np.uint64(33)
+    x *= np.uint64(0xc4ceb9fe1a85ec53)
+    x ^= x >> np.uint64(33)
+    return x
+
+
+def generate_hashes(freqs: np.ndarray, times: np.ndarray,
+                    fan_value: int = settings.DEFAULT_FAN_VALUE) -> List[Tuple[int, int]]:
     """
-    Generate hashes from the given peaks and time differences.
+    Generate hashes from the given peaks (parallel freq/time arrays) and time differences.
     """
-    idx_freq = 0
-    idx_time = 1
     if settings.PEAK_SORT:
-        peaks.sort(key=itemgetter(1))
-
-    hashes = []
-    for i in range(len(peaks)):
-        for j in range(1, fan_value):
-            if (i + j) < len(peaks):
-                freq1 = peaks[i][idx_freq]
-                freq2 = peaks[i + j][idx_freq]
-                t1 = peaks[i][idx_time]
-                t2 = peaks[i + j][idx_time]
-                t_delta = t2 - t1
-
-                if settings.MIN_HASH_TIME_DELTA <= t_delta <= settings.MAX_HASH_TIME_DELTA:
-                    # Generate SHA1 hash
-                    h = hashlib.sha1(f"{str(freq1)}|{str(freq2)}|{str(t_delta)}".encode('utf-8'))
-                    hashes.append((h.hexdigest()[:settings.FINGERPRINT_REDUCTION], t1))
-
-    return hashes
+        order = np.argsort(times, kind='stable')
+        freqs = freqs[order]
+        times = times[order]
+
+    freq1, freq2, t_delta, t1 = peak_pairs(
+        freqs, times, fan_value, settings.MIN_HASH_TIME_DELTA, settings.MAX_HASH_TIME_DELTA
+    )
+    # Reinterpret the unsigned keys as signed so they fit a BigIntegerField
+    return list(zip(pair_keys(freq1, freq2, t_delta).view(np.int64).tolist(), t1.tolist()))
+
+
+def best_alignment(query_fingerprints: List[Tuple[int, int]], db_rows: List[Tuple[int, int, int]]):
+    """
+    Most common (song_id, db offset - query offset) over every pair of query
+    fingerprint and (hash, song_id, offset) DB row sharing a hash, as
+    (song_id, offset_diff, count); None if nothing pairs up.
+    """
+    query = np.array(query_fingerprints, dtype=np.int64).reshape(-1, 2)
+    db = np.array(db_rows, dtype=np.int64).reshape(-1, 3)
+
+    # Sort the query by hash so each DB hash maps to one contiguous run of query offsets
+    order = np.argsort(query[:, 0], kind='stable')
+    query_hashes, query_offsets = query[order, 0], query[order, 1]
+    lo = np.searchsorted(query_hashes, db[:, 0], side='left')
+    runs = np.searchsorted(query_hashes, db[:, 0], side='right') - lo
+    total = int(runs.sum())
+    if not total:
+        return None
+
+    # Expand every DB row into one entry per query offset of its hash
+    row = np.repeat(np.arange(len(db)), runs)
+    run_start = np.repeat(np.cumsum(runs) - runs, runs)
+    position = lo[row] + np.arange(total) - run_start
+    pairs = np.stack([db[row, 1], db[row, 2] - query_offsets[position]], axis=1)
+
+    alignments, counts = np.unique(pairs, axis=0, return_counts=True)
+    best = int(counts.argmax())
+    return int(alignments[best, 0]), int(alignments[best, 1]), int(counts[best])
@@ -1,13 +1,12 @@
 import numpy as np
 import librosa
 from numba import jit
-import xxhash
 from scipy.ndimage import maximum_filter
 from scipy.ndimage.morphology import generate_binary_structure, binary_erosion, iterate_structure
 from typing import List, Tuple
 import logging
-from operator import itemgetter
 import settings  # Assuming your settings module exists
+from fingerprint_engine.engine import pair_keys, peak_pairs
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +31,7 @@ def fingerprint(channel_samples: List[int], Fs: int = settings.DEFAULT_FS,
     """
     try:
         # Convert samples to float32 for librosa
-        samples = np.array(channel_samples, dtype=np.float32) / 32768.0  # Normalize int16 to [-1, 1]
+        samples = np.multiply(channel_samples, 1 / 32768.0, dtype=np.float32)  # Normalize int16 to [-1, 1] in one pass
 
         # Compute spectrogram with librosa (replaces mlab.specgram)
         hop_length = int(wsize * (1 - wratio))
@@ -125,9 +124,9 @@ def get_2D_peaks(arr2D: np.ndarray, plot: bool = False,
         return []
 
 def generate_hashes(peaks: List[Tuple[int, int]], 
-                    fan_value: int = settings.DEFAULT_FAN_VALUE) -> List[Tuple[str, int]]:
+                    fan_value: int = settings.DEFAULT_FAN_VALUE) -> List[Tuple[int, int]]:
     """
-    Generate hashes from peaks using xxhash for speed.
+    Generate hashes from peaks as 64-bit integer keys (same keys as engine.generate_hashes).
     
     Args:
         peaks: List of (frequency, time) tuples.
@@ -137,29 +136,19 @@ def generate_hashes(peaks: List[Tuple[int, int]],
         List of (hash, offset) tuples.
     """
     try:
-        idx_freq = 0
-        idx_time = 1
+        peaks_arr = np.asarray(peaks, dtype=np.int32).reshape(-1, 2)
+        freqs = peaks_arr[:, 0]
+        times = peaks_arr[:, 1]
         if settings.PEAK_SORT:
-            peaks.sort(key=itemgetter(idx_time))
-
-        hashes = []
-        for i in range(len(peaks)):
-            for j in range(1, fan_value):
-                if (i + j) < len(peaks):
-                    freq1 = peaks[i][idx_freq]
-                    freq2 = peaks[i + j][idx_freq]
-                    t1 = peaks[i][idx_time]
-                    t2 = peaks[i + j][idx_time]
-                    t_delta = t2 - t1
-
-                    if settings.MIN_HASH_TIME_DELTA <= t_delta <= settings.MAX_HASH_TIME_DELTA:
-                        # Use xxhash instead of SHA1
-                        h = xxhash.xxh64(f"{freq1}|{freq2}|{t_delta}".encode('utf-8'))
-                        hash_str = h.hexdigest()[:settings.FINGERPRINT_REDUCTION]
-                        hashes.append((hash_str, t1))
+            order = np.argsort(times, kind='stable')
+            freqs = freqs[order]
+            times = times[order]
 
-        return hashes
+        freq1, freq2, t_delta, t1 = peak_pairs(
+            freqs, times, fan_value, settings.MIN_HASH_TIME_DELTA, settings.MAX_HASH_TIME_DELTA
+        )
+        return list(zip(pair_keys(freq1, freq2, t_delta).view(np.int64).tolist(), t1.tolist()))
 
     except Exception as e:
         logger.error(f"Hash generation failed: {e}")
-        return []
\ No newline at end of file
+        return []
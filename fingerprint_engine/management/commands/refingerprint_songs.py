@@ -0,0 +1,31 @@
+# management/commands/refingerprint_songs.py
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from fingerprint_engine.models import Fingerprint, Song
+from fingerprint_engine.tasks import generate_fingerprints_for_song
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete every stored fingerprint and queue fingerprinting of every song again. "
+        "Run it when the hash key changes; before migrating Fingerprint.hash from the old "
+        "hex strings to BigIntegerField, since those values can't be cast to bigint."
+    )
+
+    def handle(self, *args, **kwargs):
+        connection = connections[Fingerprint.objects.db]
+        table = connection.ops.quote_name(Fingerprint._meta.db_table)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"TRUNCATE {table}")
+        else:
+            Fingerprint.objects.all().delete()
+        self.stdout.write("Deleted all fingerprints.")
+
+        queued = 0
+        for song_id in Song.objects.values_list('id', flat=True).iterator():
+            generate_fingerprints_for_song.delay(song_id)
+            queued += 1
+        self.stdout.write(f"Queued fingerprinting for {queued} songs.")
@@ -11,17 +11,16 @@ class Song(models.Model):
 
 class Fingerprint(models.Model):
     song = models.ForeignKey(Song, on_delete=models.CASCADE)
-    #hash = models.BinaryField(db_index=True)  # Stores BYTEA in PostgreSQL, BLOB in SQLite
-    hash = models.CharField(max_length=20, db_index=True)
+    hash = models.BigIntegerField()  # 64-bit pair key from engine.pair_keys, stored signed
 
     offset = models.IntegerField()
     date_created = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        indexes = [
-            models.Index(fields=['hash', 'song_id'])
-        ]
-        unique_together = ('song', 'offset', 'hash')
+        # Leads on hash, so the one unique index also serves hash__in lookups, and as it holds
+        # song_id and offset too, (hash, song_id, offset) reads are index-only scans;
+        # bulk inserts use ignore_conflicts and let it drop duplicates
+        unique_together = ('hash', 'song', 'offset')
 
 
 
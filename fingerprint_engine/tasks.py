@@ -1,43 +1,49 @@
+import logging
 import os
 import subprocess
 import uuid
 
+import numpy as np
+from celery import shared_task
+import soundfile as sf
+
 from fingerprint_engine.engine import fingerprint
 
 from .models import Song, Fingerprint
 
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BATCH_SIZE = 5000
+
+@shared_task
 def generate_fingerprints_for_song(song_id):
     # Fetch the uploaded song
     song = Song.objects.get(id=song_id)
     original_path = song.audio_file.path
 
-    # Convert original file to temporary WAV using FFmpeg
-    wav_path = convert_to_wav_ffmpeg(original_path, output_dir=os.path.dirname(original_path))
-    if not wav_path:
-        print(f"[ERROR] FFmpeg failed to convert: {original_path}")
-        return
+    # Decode to mono 44.1 kHz 16-bit samples (FFmpeg only if the file isn't already in that format)
+    decoded = load_samples(original_path)
+    if decoded is None:
+        # Fail the task so the queued job reports it instead of ending as SUCCESS
+        raise RuntimeError(f"Could not decode audio for song {song_id}")
+    samples, rate = decoded
 
     try:
-        # Read WAV file into numpy array
-        samples, rate = read_wav_as_array(wav_path)
-
         # Generate audio fingerprints
         hashes = fingerprint(samples, Fs=rate)
 
-        # Store fingerprints in the DB
-        fingerprint_objects = [
-            Fingerprint(song=song, hash=h, offset=o)
-            for h, o in hashes
-        ]
-        Fingerprint.objects.bulk_create(fingerprint_objects)
+        # Store fingerprints in the DB, a bounded batch of model instances at a time;
+        # rows already stored for this song (same song/offset/hash) are skipped
+        for start in range(0, len(hashes), FINGERPRINT_BATCH_SIZE):
+            Fingerprint.objects.bulk_create(
+                [Fingerprint(song=song, hash=h, offset=o) for h, o in hashes[start:start + FINGERPRINT_BATCH_SIZE]],
+                ignore_conflicts=True,
+            )
+    except Exception:
+        logger.exception(f"Fingerprinting failed for song {song_id}")
+        raise
 
-        print(f"[INFO] Fingerprinted '{song.title}' with {len(hashes)} hashes.")
-    except Exception as e:
-        print(f"[ERROR] Fingerprinting failed: {e}")
-    finally:
-        # Clean up the temporary WAV file
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
+    logger.info(f"Fingerprinted '{song.title}' with {len(hashes)} hashes.")
 
 def convert_to_wav_ffmpeg(input_path, output_dir=None):
     if not output_dir:
@@ -60,7 +66,7 @@ def convert_to_wav_ffmpeg(input_path, output_dir=None):
         subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return output_path
     except subprocess.CalledProcessError:
-        print(f"[ERROR] FFmpeg failed to convert {input_path}")
+        logger.error(f"FFmpeg failed to convert {input_path}")
         return None
 
 
@@ -70,23 +76,44 @@ def convert_to_wav_ffmpeg(input_path, output_dir=None):
 
 
 
-import wave
-import numpy as np
-
 def read_wav_as_array(path: str):
-    with wave.open(path, 'rb') as wf:
-        channels = wf.getnchannels()
-        frames = wf.readframes(wf.getnframes())
-        framerate = wf.getframerate()
+    samples, framerate = sf.read(path, dtype='int16', always_2d=False)
 
-        # 16-bit PCM assumed
-        samples = np.frombuffer(frames, dtype=np.int16)
+    if samples.ndim == 2:
+        # More accurate downmixing for stereo
+        samples = samples.mean(axis=1, dtype=np.float32).astype(np.int16)
 
-        if channels > 1:
-            # More accurate downmixing for stereo
-            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, framerate
 
-        return samples, framerate
+
+def load_samples(path: str, sample_rate: int = 44100):
+    """
+    Mono 16-bit samples of an audio file at sample_rate, as (samples, rate).
+    Files that are already mono PCM_16 at that rate are read directly; anything
+    else is decoded by FFmpeg straight to a raw PCM pipe, with no temp WAV.
+    Returns None if the file can't be decoded.
+    """
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        info = None
+    if info is not None and info.samplerate == sample_rate and info.channels == 1 and info.subtype == 'PCM_16':
+        return read_wav_as_array(path)
+
+    command = [
+        "ffmpeg",
+        "-i", path,              # input file
+        "-ac", "1",              # mono
+        "-ar", str(sample_rate), # sample rate
+        "-f", "s16le",           # raw 16-bit little-endian PCM
+        "-",                     # to stdout
+    ]
+    try:
+        result = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, OSError):
+        logger.error(f"FFmpeg failed to convert {path}")
+        return None
+    return np.frombuffer(result.stdout, dtype=np.int16), sample_rate
 
 
 
@@ -98,7 +125,10 @@ def read_wav_as_array(path: str):
 def extract_fingerprints(file_path):
     try:
         # Read file into samples and sample rate
-        samples, sr = read_wav_as_array(file_path)
+        decoded = load_samples(file_path)
+        if decoded is None:
+            return []
+        samples, sr = decoded
 
         # Use the same fingerprinting engine used for DB songs
         fingerprints = fingerprint(samples, Fs=sr)
@@ -106,5 +136,5 @@ def extract_fingerprints(file_path):
         return fingerprints
 
     except Exception as e:
-        print(f"[ERROR] Failed to extract fingerprints: {e}")
+        logger.exception(f"Failed to extract fingerprints: {e}")
         return []
\ No newline at end of file
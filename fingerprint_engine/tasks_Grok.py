@@ -9,8 +9,9 @@ import hashlib
 import logging
 import os
 import time
+import numpy as np
 from tempfile import NamedTemporaryFile
-from collections import Counter
+from collections import Counter, defaultdict
 from .models import Song, Fingerprint
 from .tasks import generate_fingerprints_for_song, convert_to_wav_ffmpeg, extract_fingerprints
 
@@ -78,52 +79,67 @@ def detect_audio_match(request):
     if not audio_file:
         return Response({"error": "No audio file uploaded."}, status=400)
 
+    # Save audio to temporary file, hashing it for the cache key in the same pass
+    digest = hashlib.sha256()
+    with NamedTemporaryFile(delete=False) as temp:
+        for chunk in audio_file.chunks():
+            temp.write(chunk)
+            digest.update(chunk)
+        original_temp_path = temp.name
+    audio_hash = digest.hexdigest()
+
     # Check cache
-    audio_hash = hashlib.sha256(audio_file.read()).hexdigest()
     cached_result = cache.get(audio_hash)
     if cached_result:
         logger.info(f"Returning cached result for audio hash {audio_hash}")
+        os.remove(original_temp_path)
         return Response(cached_result)
-    audio_file.seek(0)  # Reset file pointer after hashing
-
-    # Save audio to temporary file
-    with NamedTemporaryFile(delete=False) as temp:
-        for chunk in audio_file.chunks():
-            temp.write(chunk)
-        original_temp_path = temp.name
 
     try:
-        # Convert to WAV
-        wav_path = convert_to_wav_ffmpeg(original_temp_path)
-        if not wav_path:
-            return Response({"error": "Failed to convert audio to WAV."}, status=500)
-
-        # Extract fingerprints
         t_start = time.time()
-        query_fingerprints = extract_fingerprints(wav_path)
+
+        # Query fingerprints of this exact file are cached as a dense int64 (hash, offset) buffer,
+        # so repeat queries skip the WAV conversion and fingerprinting
+        fingerprints_key = f"fps:{audio_hash}"
+        packed_fingerprints = cache.get(fingerprints_key)
+        if packed_fingerprints is not None:
+            query_fingerprints = np.frombuffer(packed_fingerprints, dtype=np.int64).reshape(-1, 2).tolist()
+        else:
+            # Convert to WAV
+            wav_path = convert_to_wav_ffmpeg(original_temp_path)
+            if not wav_path:
+                return Response({"error": "Failed to convert audio to WAV."}, status=500)
+
+            # Extract fingerprints
+            query_fingerprints = extract_fingerprints(wav_path)
+            # extract_fingerprints returns [] on any failure; don't pin that for a day
+            if query_fingerprints:
+                cache.set(fingerprints_key, np.asarray(query_fingerprints, dtype=np.int64).tobytes(), timeout=86400)
         t_fingerprint = time.time()
 
         if not query_fingerprints:
             return Response({"match": False, "reason": "No fingerprints extracted."}, status=200)
 
-        # Batch query hashes
-        query_hashes = [h for h, _ in query_fingerprints]
-        db_fps = []
+        # Index the query offsets by hash so each DB row is one dict lookup
+        query_offsets = defaultdict(list)
+        for h, query_offset in query_fingerprints:
+            query_offsets[h].append(query_offset)
+
+        # Stream (hash, song_id, offset) rows in batches of distinct hashes, straight into the histogram
+        query_hashes = list(query_offsets)
+        match_map = Counter()
+        matched_rows = 0
         batch_size = 1000
         for i in range(0, len(query_hashes), batch_size):
-            db_fps.extend(Fingerprint.objects.filter(hash__in=query_hashes[i:i + batch_size]))
+            rows = Fingerprint.objects.filter(hash__in=query_hashes[i:i + batch_size]).values_list('hash', 'song_id', 'offset')
+            for h, song_id, offset in rows.iterator(chunk_size=10_000):
+                matched_rows += 1
+                for query_offset in query_offsets[h]:
+                    match_map[(song_id, offset - query_offset)] += 1
 
-        if not db_fps:
+        if not matched_rows:
             return Response({"match": False, "reason": "No matching hashes in database."}, status=200)
 
-        # Match fingerprints
-        match_map = Counter()
-        for fp in db_fps:
-            for h, query_offset in query_fingerprints:
-                if fp.hash == h:
-                    offset_diff = fp.offset - query_offset
-                    match_map[(fp.song_id, offset_diff)] += 1
-
         if not match_map:
             return Response({"match": False, "reason": "No offset alignment found."}, status=200)
 
@@ -1,42 +1,44 @@
 import numpy as np
+import soundfile as sf
+import soxr
+from numpy.lib.stride_tricks import sliding_window_view
 
-def load_audio(filename):
-    audio = AudioSegment.from_file(filename).set_channels(1).set_frame_rate(44100)
-    samples = np.array(audio.get_array_of_samples())
-    return samples
+from fingerprint_engine.engine import hann_window, pair_keys, peak_pairs
+
+
+def load_audio(filename, sample_rate=44100):
+    # Decode straight into a float32 buffer, downmix, resample only if needed
+    data, sr = sf.read(filename, dtype='float32', always_2d=False)
+    if data.ndim == 2:
+        data = data.mean(axis=1, dtype=np.float32)
+    if sr != sample_rate:
+        data = soxr.resample(data, sr, sample_rate)
+    # Keep the 16-bit PCM amplitude scale the peak thresholds were tuned on
+    data *= 32768
+    return data
 
 
 def get_spectrogram(samples, window_size=4096, hop_size=2048):
-    spectrogram = []
-    for i in range(0, len(samples) - window_size, hop_size):
-        window = samples[i:i+window_size] * np.hanning(window_size)
-        spectrum = np.abs(np.fft.fft(window))[:window_size//2]
-        spectrogram.append(spectrum)
-    return np.array(spectrogram)
+    if len(samples) <= window_size:
+        return np.empty((0, window_size // 2))
+    window, _ = hann_window(window_size)
+    # Frames start at 0, hop_size, ... strictly before len(samples) - window_size
+    frames = sliding_window_view(samples, window_size)[:len(samples) - window_size:hop_size]
+    return np.abs(np.fft.rfft(frames * window, axis=1))[:, :window_size // 2]
 
 
 
 def get_peaks(spectrogram, threshold=10):
-    peaks = []
-    for t, spectrum in enumerate(spectrogram):
-        for f in range(1, len(spectrum) - 1):
-            if spectrum[f] > threshold and spectrum[f] > spectrum[f - 1] and spectrum[f] > spectrum[f + 1]:
-                peaks.append((t, f))
-    return peaks
+    # Bins strictly above both frequency neighbours and the threshold (edges excluded)
+    mid = spectrogram[:, 1:-1]
+    mask = (mid > threshold) & (mid > spectrogram[:, :-2]) & (mid > spectrogram[:, 2:])
+    t_idx, f_idx = np.nonzero(mask)
+    return list(zip(t_idx.tolist(), (f_idx + 1).tolist()))
 
 
 
-import hashlib
 
 def generate_hashes(peaks, fan_value=5):
-    hashes = []
-    for i in range(len(peaks)):
-        for j in range(1, fan_value):
-            if i + j < len(peaks):
-                t1, f1 = peaks[i]
-                t2, f2 = peaks[i + j]
-                t_delta = t2 - t1
-                if 0 < t_delta <= 200:
-                    h = hashlib.sha1(f"{f1}|{f2}|{t_delta}".encode()).hexdigest()[0:20]
-                    hashes.append((h, t1))
-    return hashes
+    peaks_arr = np.asarray(peaks, dtype=np.int32).reshape(-1, 2)
+    freq1, freq2, t_delta, t1 = peak_pairs(peaks_arr[:, 1], peaks_arr[:, 0], fan_value, 1, 200)
+    return list(zip(pair_keys(freq1, freq2, t_delta).view(np.int64).tolist(), t1.tolist()))
@@ -1,11 +1,12 @@
 import os
+from django.db import connections
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 from django.core.files.storage import default_storage
 
+from fingerprint_engine.engine import best_alignment
 from fingerprint_engine.tasks import (
-    convert_to_wav_ffmpeg,
     extract_fingerprints,
     generate_fingerprints_for_song,
 )
@@ -18,7 +19,6 @@ from django.http import JsonResponse
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser
 from .models import Song, Fingerprint
-from collections import Counter
 
 
 @csrf_exempt  # Only for development — better to use CSRF token or API token in production
@@ -33,19 +33,21 @@ def upload_audio_api(request):
         # Save the file
         song = Song.objects.create(title=title, audio_file=audio_file)
 
-        # Trigger fingerprinting
-        generate_fingerprints_for_song(song.id)
+        # Queue fingerprinting on a Celery worker instead of blocking the request
+        task = generate_fingerprints_for_song.delay(song.id)
 
-        # Respond with success
+        # Respond with the queued job
         return JsonResponse(
             {
-                "message": "Audio uploaded and fingerprinting started.",
+                "message": "Audio uploaded and fingerprinting queued.",
+                "task_id": task.id,
                 "song": {
                     "id": song.id,
                     "title": song.title,
                     "file_url": song.audio_file.url,
                 },
-            }
+            },
+            status=202,
         )
 
     return JsonResponse({"error": "Only POST method allowed."}, status=405)
@@ -54,6 +56,42 @@ def upload_audio_api(request):
 
 import time
 
+
+def db_best_alignment(query_fingerprints, using):
+    """
+    best_alignment computed inside PostgreSQL: the query (hash, offset) pairs are
+    sent as two arrays, joined against the fingerprint table on hash and grouped
+    by (song_id, offset difference), so only the winning row comes back.
+    :param query_fingerprints:
+    :param using:
+    :return: (song_id, offset_diff, count), or None if no hash matched
+    """
+    hashes, offsets = zip(*query_fingerprints)
+    sql = (
+        'SELECT f.song_id, f."offset" - q.query_offset AS offset_diff, COUNT(*) AS matches '
+        'FROM {table} f JOIN unnest(%s::bigint[], %s::integer[]) AS q(hash, query_offset) ON f.hash = q.hash '
+        'GROUP BY 1, 2 ORDER BY 3 DESC LIMIT 1'
+    ).format(table=Fingerprint._meta.db_table)
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, [list(hashes), list(offsets)])
+        return cursor.fetchone()
+
+
+def matching_fingerprint_rows(query_hashes, batch_size=1000):
+    """
+    Stream the (hash, song_id, offset) rows for query_hashes, querying
+    batch_size distinct hashes at a time so no single IN list grows unbounded.
+    :param query_hashes:
+    :param batch_size:
+    :return:
+    """
+    distinct_hashes = list(dict.fromkeys(query_hashes))
+    for start in range(0, len(distinct_hashes), batch_size):
+        batch = distinct_hashes[start:start + batch_size]
+        rows = Fingerprint.objects.filter(hash__in=batch).values_list('hash', 'song_id', 'offset')
+        yield from rows.iterator(chunk_size=2000)
+
+
 @api_view(['POST'])
 @parser_classes([MultiPartParser])
 def detect_audio_match(request):
@@ -66,38 +104,34 @@ def detect_audio_match(request):
             temp.write(chunk)
         original_temp_path = temp.name
 
-    # Step 1: Convert to proper WAV
-    wav_path = convert_to_wav_ffmpeg(original_temp_path)
-
-    if not wav_path:
-        os.remove(original_temp_path)
-        return JsonResponse({"error": "Failed to convert audio to WAV"}, status=500)
-
     try:
         t_start = time.time()
-        query_fingerprints = extract_fingerprints(wav_path)
+        # Decodes via an FFmpeg pipe (or directly, for mono 44.1 kHz PCM_16 WAV)
+        query_fingerprints = extract_fingerprints(original_temp_path)
         t_fingerprint = time.time()
 
         if not query_fingerprints:
             return JsonResponse({"match": False, "reason": "No fingerprints extracted"})
 
         query_hashes = [h for h, _ in query_fingerprints]
-        db_fps = Fingerprint.objects.filter(hash__in=query_hashes)
-
-        if not db_fps.exists():
-            return JsonResponse({"match": False, "reason": "No matching hashes in DB"})
-
-        match_map = Counter()
-        for fp in db_fps:
-            for h, query_offset in query_fingerprints:
-                if fp.hash == h:
-                    offset_diff = fp.offset - query_offset
-                    match_map[(fp.song_id, offset_diff)] += 1
-
-        if not match_map:
-            return JsonResponse({"match": False, "reason": "No offset alignment found"})
-
-        (song_id, offset_diff), match_count = match_map.most_common(1)[0]
+        if connections[Fingerprint.objects.db].vendor == 'postgresql':
+            # One GROUP BY round-trip; the hash-leading unique index serves the join
+            alignment = db_best_alignment(query_fingerprints, Fingerprint.objects.db)
+            if alignment is None:
+                return JsonResponse({"match": False, "reason": "No matching hashes in DB"})
+        else:
+            # Plain tuples instead of Fingerprint instances, one bounded IN list per batch of distinct hashes
+            db_fps = list(matching_fingerprint_rows(query_hashes))
+
+            if not db_fps:
+                return JsonResponse({"match": False, "reason": "No matching hashes in DB"})
+
+            # Offset histogram of the hash join, computed in numpy
+            alignment = best_alignment(query_fingerprints, db_fps)
+            if alignment is None:
+                return JsonResponse({"match": False, "reason": "No offset alignment found"})
+
+        song_id, offset_diff, match_count = alignment
         matched_song = Song.objects.get(id=song_id)
 
         # Stats
@@ -143,6 +177,4 @@ def detect_audio_match(request):
         return JsonResponse({"error": str(e)}, status=500)
 
     finally:
-        os.remove(original_temp_path)
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
\ No newline at end of file
+        os.remove(original_temp_path)
\ No newline at end of file
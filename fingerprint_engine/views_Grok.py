@@ -14,17 +14,20 @@ def detect_audio_match(request):
     if not audio_file:
         return Response({"error": "No audio file uploaded"}, status=400)
 
-    # Check cache
-    cache_key = hashlib.sha256(audio_file.read()).hexdigest()
-    cached_result = cache.get(cache_key)
-    if cached_result:
-        return Response(cached_result)
-
-    # Process audio
+    # Save audio, hashing it for the cache key in the same pass
+    digest = hashlib.sha256()
     with NamedTemporaryFile(delete=False) as temp:
         for chunk in audio_file.chunks():
             temp.write(chunk)
+            digest.update(chunk)
         original_temp_path = temp.name
+    cache_key = digest.hexdigest()
+
+    # Check cache
+    cached_result = cache.get(cache_key)
+    if cached_result:
+        os.remove(original_temp_path)
+        return Response(cached_result)
 
     wav_path = convert_to_wav_ffmpeg(original_temp_path)
     if not wav_path:
@@ -39,7 +42,9 @@ def detect_audio_match(request):
         query_hashes = [h for h, _ in query_fingerprints]
         db_fps = []
         for chunk in chunk_list(query_hashes, 1000):
-            db_fps.extend(Fingerprint.objects.filter(hash__in=chunk))
+            # (hash, song_id, offset) tuples, streamed; no Fingerprint instances
+            rows = Fingerprint.objects.filter(hash__in=chunk).values_list('hash', 'song_id', 'offset')
+            db_fps.extend(rows.iterator(chunk_size=5000))
 
         # Matching logic (unchanged)
         # ...
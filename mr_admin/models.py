@@ -1,15 +1,14 @@
 from django.db import models
-from django.db.models.signals import pre_save
 from django.contrib.auth import get_user_model
 
-from core.utils import unique_admin_id_generator
+from core.utils import generate_admin_id
 
 
 User = get_user_model()
 
 class MrAdmin(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mr_admin')
-    admin_id = models.CharField(max_length=200, null=True, blank=True)
+    admin_id = models.CharField(max_length=200, null=True, blank=True, default=generate_admin_id)
     
     
     address = models.TextField(null=True, blank=True)
@@ -25,12 +24,3 @@ class MrAdmin(models.Model):
 
     def __str__(self):
         return self.user.email
-
-
-
-def pre_save_admin_id_receiver(sender, instance, *args, **kwargs):
-    if not instance.admin_id:
-        instance.admin_id = unique_admin_id_generator(instance)
-
-pre_save.connect(pre_save_admin_id_receiver, sender=MrAdmin)
-
@@ -1,12 +1,12 @@
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 
 from ..models import ProgramStaff, StationProgram
 from ..serializers import ProgramStaffSerializer, ProgramStaffDetailsSerializer
 from core.authentication import CustomJWTAuthentication
+from core.pagination import keyset_paginate
 from rest_framework.permissions import IsAuthenticated
 
 
@@ -63,7 +63,8 @@ def get_all_program_staff_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     staff_qs = ProgramStaff.objects.filter(is_archived=False)
@@ -74,23 +75,15 @@ def get_all_program_staff_view(request):
             Q(role__icontains=search_query)
         )
 
-    paginator = Paginator(staff_qs, page_size)
-
-    try:
-        paginated = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated = paginator.page(1)
-    except EmptyPage:
-        paginated = paginator.page(paginator.num_pages)
+    paginated, next_cursor = keyset_paginate(staff_qs, cursor, page_size)
 
     serializer = ProgramStaffSerializer(paginated, many=True)
     data['program_staff'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated.next_page_number() if paginated.has_next() else None,
-        'previous': paginated.previous_page_number() if paginated.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (staff_qs.count() + page_size - 1) // page_size
 
     payload['message'] = 'Successful'
     payload['data'] = data
@@ -266,7 +259,8 @@ def get_all_archived_program_staff_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     staff_qs = ProgramStaff.objects.filter(is_archived=True)
@@ -277,23 +271,15 @@ def get_all_archived_program_staff_view(request):
             Q(role__icontains=search_query)
         )
 
-    paginator = Paginator(staff_qs, page_size)
-
-    try:
-        paginated = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated = paginator.page(1)
-    except EmptyPage:
-        paginated = paginator.page(paginator.num_pages)
+    paginated, next_cursor = keyset_paginate(staff_qs, cursor, page_size)
 
     serializer = ProgramStaffSerializer(paginated, many=True)
     data['program_staff'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated.next_page_number() if paginated.has_next() else None,
-        'previous': paginated.previous_page_number() if paginated.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (staff_qs.count() + page_size - 1) // page_size
 
     payload['message'] = 'Successful'
     payload['data'] = data
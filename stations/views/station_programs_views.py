@@ -1,12 +1,12 @@
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 
 from ..models import Station, User
 from ..serializers import StationSerializer, StationDetailsSerializer
 from core.authentication import CustomJWTAuthentication
+from core.pagination import keyset_paginate
 from rest_framework.permissions import IsAuthenticated
 
 
@@ -14,7 +14,6 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q
 
 from ..models import StationProgram, Station
@@ -74,7 +73,8 @@ def get_all_station_programs_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     all_programs = StationProgram.objects.filter(is_archived=False)
@@ -85,24 +85,16 @@ def get_all_station_programs_view(request):
             Q(description__icontains=search_query)
         )
 
-    paginator = Paginator(all_programs, page_size)
-
-    try:
-        paginated = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated = paginator.page(1)
-    except EmptyPage:
-        paginated = paginator.page(paginator.num_pages)
+    paginated, next_cursor = keyset_paginate(all_programs, cursor, page_size)
 
     serializer = StationProgramSerializer(paginated, many=True)
 
     data['programs'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated.next_page_number() if paginated.has_next() else None,
-        'previous': paginated.previous_page_number() if paginated.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (all_programs.count() + page_size - 1) // page_size
 
     payload['message'] = 'Successful'
     payload['data'] = data
@@ -278,7 +270,8 @@ def get_all_archived_station_programs_view(request):
     errors = {}
 
     search_query = request.query_params.get('search', '')
-    page_number = request.query_params.get('page', 1)
+    cursor = request.query_params.get('cursor', '')
+    with_count = request.query_params.get('with_count') == '1'
     page_size = 10
 
     all_programs = StationProgram.objects.filter(is_archived=True)
@@ -289,23 +282,15 @@ def get_all_archived_station_programs_view(request):
             Q(description__icontains=search_query)
         )
 
-    paginator = Paginator(all_programs, page_size)
-
-    try:
-        paginated = paginator.page(page_number)
-    except PageNotAnInteger:
-        paginated = paginator.page(1)
-    except EmptyPage:
-        paginated = paginator.page(paginator.num_pages)
+    paginated, next_cursor = keyset_paginate(all_programs, cursor, page_size)
 
     serializer = StationProgramSerializer(paginated, many=True)
     data['programs'] = serializer.data
     data['pagination'] = {
-        'page_number': paginated.number,
-        'total_pages': paginator.num_pages,
-        'next': paginated.next_page_number() if paginated.has_next() else None,
-        'previous': paginated.previous_page_number() if paginated.has_previous() else None,
+        'next_cursor': next_cursor,
     }
+    if with_count:
+        data['pagination']['total_pages'] = (all_programs.count() + page_size - 1) // page_size
 
     payload['message'] = 'Successful'
     payload['data'] = data